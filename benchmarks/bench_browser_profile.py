@@ -0,0 +1,120 @@
+"""Measure RSS, CPU time and bytes transferred per sweep for each browser profile.
+
+Runs real scan_channel sweeps over the configured channels (DISCORD_CHANNEL_URLS,
+with the saved storage state) once per profile. RSS and CPU need the optional
+psutil package; without it only bytes and wall time are reported.
+
+Usage: python benchmarks/bench_browser_profile.py [--profiles full,lightweight] [--sweeps 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Benchmark sweeps should not wait on the production navigation budget
+os.environ.setdefault("MAX_OPERATIONS_PER_HOUR", "100000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000")
+os.environ.setdefault("RATE_LIMIT_DELAY", "0")
+os.environ.setdefault("CACHE_PATH", os.path.join(tempfile.mkdtemp(), "bench_cache.jsonl"))
+
+from playwright.async_api import async_playwright
+
+import playwright_discord_monitor as monitor
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def browser_processes():
+    if psutil is None:
+        return []
+    return [
+        proc for proc in psutil.Process().children(recursive=True)
+        if "chrom" in proc.name().lower() or "headless_shell" in proc.name().lower()
+    ]
+
+
+def resource_usage():
+    """Total (rss_bytes, cpu_seconds) of the Chromium process tree, or (None, None)"""
+    if psutil is None:
+        return None, None
+    rss = cpu = 0
+    for proc in browser_processes():
+        try:
+            rss += proc.memory_info().rss
+            times = proc.cpu_times()
+            cpu += times.user + times.system
+        except psutil.NoSuchProcess:
+            continue
+    return rss, cpu
+
+
+async def count_bytes(context, page, totals):
+    session = await context.new_cdp_session(page)
+    await session.send("Network.enable")
+    session.on("Network.loadingFinished", lambda event: totals.__setitem__(
+        "bytes", totals["bytes"] + event.get("encodedDataLength", 0)))
+
+
+async def measure_profile(p, profile, channel_urls, sweeps):
+    browser = await monitor.launch_monitor_browser(p, profile)
+    context = await monitor.new_monitor_context(browser, profile)
+    page = await monitor.new_monitor_page(context)
+    totals = {"bytes": 0}
+    await count_bytes(context, page, totals)
+
+    _, cpu_before = resource_usage()
+    started = time.perf_counter()
+    for _ in range(sweeps):
+        for channel_url in channel_urls:
+            try:
+                await monitor.scan_channel(page, channel_url)
+            except Exception as e:
+                print(f"[BENCH] ⚠️ {profile}: scan of {channel_url} failed: {e}")
+    elapsed = time.perf_counter() - started
+    rss, cpu_after = resource_usage()
+
+    await context.close()
+    await browser.close()
+    return {
+        "wall": elapsed / sweeps,
+        "bytes": totals["bytes"] / sweeps,
+        "rss": rss,
+        "cpu": None if cpu_after is None else (cpu_after - cpu_before) / sweeps,
+    }
+
+
+def fmt(value, scale, unit):
+    return "n/a" if value is None else f"{value / scale:.1f} {unit}"
+
+
+async def run(args):
+    channel_urls = monitor.load_channel_urls()
+    if not channel_urls:
+        print("[BENCH] ⚠️ No channel URLs configured. Set DISCORD_CHANNEL_URLS.")
+        return
+    if psutil is None:
+        print("[BENCH] psutil not installed; RSS and CPU will be reported as n/a.")
+
+    async with async_playwright() as p:
+        for profile in args.profiles:
+            result = await measure_profile(p, profile, channel_urls, args.sweeps)
+            print(f"[BENCH] {profile:<12} per sweep: wall {result['wall']:.1f} s | "
+                  f"transferred {fmt(result['bytes'], 1024 * 1024, 'MiB')} | "
+                  f"CPU {fmt(result['cpu'], 1, 's')} | RSS after {fmt(result['rss'], 1024 * 1024, 'MiB')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=lambda v: v.split(","), default=list(monitor.BROWSER_PROFILES))
+    parser.add_argument("--sweeps", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare per-detection save cost of the append-only cache log and the old full rewrite.
+
+Saves go through the real record_processed path, including cache_lock and the
+periodic compaction, so the max and p99 columns show what a compaction costs
+at each history size. The default --appends is enough to cross
+CACHE_COMPACT_MIN_RECORDS at least once.
+
+Usage: python benchmarks/bench_cache_store.py [--sizes 10000,100000,1000000] [--appends 25000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import playwright_discord_monitor as monitor
+
+
+def legacy_save(path, processed_messages):
+    """The original save_cache: serialise everything and rewrite the file"""
+    data = {"processed_messages": list(processed_messages), "known_users": {}}
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def make_keys(count):
+    return {f"msg_{1200000000000000000 + i}" for i in range(count)}
+
+
+def bench_size(workdir, size, appends, legacy_rounds):
+    keys = make_keys(size)
+    dedup = monitor.DedupCache(size + appends, monitor.DEDUP_TTL_SECONDS)
+    for key in keys:
+        dedup.add(key)
+
+    log = monitor.CacheLog(os.path.join(workdir, f"cache_{size}.jsonl"))
+    log.compact([{"t": "dedup", "data": dedup.dump()}])
+    monitor.processed_messages = dedup
+    monitor.cache_log = log
+    latencies = []
+    for i in range(appends):
+        start = time.perf_counter()
+        monitor.record_processed(f"new_{size}_{i}")
+        latencies.append(time.perf_counter() - start)
+    log.close()
+    latencies.sort()
+    mean_us = sum(latencies) / appends * 1e6
+    p99_us = latencies[min(appends - 1, int(appends * 0.99))] * 1e6
+    max_ms = latencies[-1] * 1000
+
+    start = time.perf_counter()
+    restored = monitor.DedupCache(size + appends, monitor.DEDUP_TTL_SECONDS)
+    for record in monitor.CacheLog(log.path).replay():
+        if record["t"] == "dedup":
+            restored.load(record["data"])
+        else:
+            restored.insert(record["h"], record["ts"])
+    replay_s = time.perf_counter() - start
+    replayed = len(restored)
+
+    legacy_path = os.path.join(workdir, f"cache_{size}.json")
+    start = time.perf_counter()
+    for _ in range(legacy_rounds):
+        legacy_save(legacy_path, keys)
+    legacy_ms = (time.perf_counter() - start) / legacy_rounds * 1000
+
+    print(f"[BENCH] {size:>9,} entries: save mean {mean_us:7.1f} µs | p99 {p99_us:7.1f} µs | max {max_ms:8.1f} ms "
+          f"(compaction) | full rewrite {legacy_ms:9.1f} ms/save | load {replayed:,} entries in {replay_s:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[10000, 100000, 1000000])
+    parser.add_argument("--appends", type=int, default=max(1000, int(monitor.CACHE_COMPACT_MIN_RECORDS * 2.5)))
+    parser.add_argument("--legacy-rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            bench_size(workdir, size, args.appends, args.legacy_rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare sequential join matching with the pooled catch-up path.
+
+For each backlog size this matches the same corpus on the event loop thread
+(the old path) and through match_in_pool on a process pool and a thread pool.
+Alongside throughput it reports the worst event-loop stall seen by a 10 ms
+ticker, which is what browser control and the bot heartbeat would feel.
+
+Usage: python benchmarks/bench_catchup.py [--sizes 1000,10000,100000] [--workers N] [--chunk 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import playwright_discord_monitor as monitor
+from discord_fixtures import build_messages
+
+
+async def measure(run, corpus):
+    """Run `run(corpus)` on the loop while a ticker records the longest stall"""
+    stalls = [0.0]
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stalls[0] = max(stalls[0], now - last - 0.01)
+            last = now
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await run(corpus)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return elapsed, stalls[0], results
+
+
+async def sequential(corpus):
+    return monitor.JOIN_MATCHER.match_batch(corpus)
+
+
+async def pooled(corpus):
+    return await monitor.match_in_pool(corpus)
+
+
+async def run(args):
+    monitor.CATCHUP_WORKERS = args.workers
+    monitor.CATCHUP_CHUNK_SIZE = args.chunk
+    for size in args.sizes:
+        corpus = [message["text"] for message in build_messages(size, args.join_ratio)]
+        rows = [("sequential", await measure(sequential, corpus))]
+        for executor in ("process", "thread"):
+            monitor.CATCHUP_EXECUTOR = executor
+            monitor.catchup_pool = None
+            # Warm the pool so worker start-up is not billed to the first size
+            await monitor.match_in_pool(corpus[:args.chunk])
+            rows.append((f"{executor} pool", await measure(pooled, corpus)))
+            monitor.get_catchup_pool().shutdown()
+
+        baseline, _, expected = rows[0][1]
+        for label, (elapsed, stall, results) in rows:
+            if results != expected:
+                print(f"[BENCH] ❌ {label} results differ from sequential matching at {size} messages")
+                sys.exit(1)
+            print(f"[BENCH] {size:>7,} msgs {label:<12} {elapsed * 1000:9.1f} ms  "
+                  f"{size / elapsed:12,.0f} msg/s  x{baseline / elapsed:4.1f}  worst loop stall {stall * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, default=monitor.CATCHUP_WORKERS)
+    parser.add_argument("--chunk", type=int, default=monitor.CATCHUP_CHUNK_SIZE)
+    parser.add_argument("--join-ratio", type=float, default=0.02)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare per-locator and batched message extraction on a synthetic channel page.
+
+Usage: python benchmarks/bench_extraction.py [--messages 200] [--scan 5,25,100] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright
+
+import playwright_discord_monitor as monitor
+from discord_fixtures import build_messages, render_channel_html
+
+
+async def time_extraction(extract, page, limit, rounds):
+    best = float("inf")
+    result = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = await extract(page, limit)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+async def run(args):
+    messages = build_messages(args.messages, join_ratio=0.05)
+    page_html = render_channel_html("Bench Server", "welcome", "1039661470960595054", messages)
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(page_html)
+
+        print(f"[BENCH] Page with {len(messages)} messages, best of {args.rounds} rounds")
+        for limit in args.scan:
+            locator_ms, locator_result = await time_extraction(
+                monitor.extract_recent_messages_per_locator, page, limit, args.rounds)
+            batched_ms, batched_result = await time_extraction(
+                monitor.extract_recent_messages, page, limit, args.rounds)
+            if [m["text"] for m in locator_result] != [m["text"] for m in batched_result]:
+                print(f"[BENCH] ❌ Extracted texts differ at scan size {limit}")
+                sys.exit(1)
+            print(f"[BENCH] scan {limit:>4}: locator {locator_ms:8.1f} ms | batched {batched_ms:6.1f} ms")
+
+        await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--scan", type=lambda v: [int(x) for x in v.split(",")], default=[5, 25, 100])
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the precompiled JoinMatcher against the original per-pattern loop.
+
+Usage: python benchmarks/bench_join_matcher.py [--messages 50000] [--join-ratio 0.02]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import playwright_discord_monitor as monitor
+from discord_fixtures import build_messages
+
+
+def legacy_find_join_username(message_content):
+    """The original implementation: one re.search per pattern per message"""
+    for pattern in monitor.JOIN_PATTERNS:
+        match = re.search(pattern, message_content, re.IGNORECASE)
+        if match:
+            if len(match.groups()) >= 2 and match.group(2).isdigit():
+                return f"User ID: {match.group(2)}"
+            elif len(match.groups()) >= 2:
+                return match.group(2)
+            else:
+                return match.group(1)
+    return None
+
+
+def build_corpus(count, join_ratio):
+    return [message["text"] for message in build_messages(count, join_ratio)]
+
+
+def timed(fn, corpus):
+    start = time.perf_counter()
+    results = fn(corpus)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--join-ratio", type=float, default=0.02)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.join_ratio)
+
+    legacy_time, legacy_results = timed(lambda texts: [legacy_find_join_username(t) for t in texts], corpus)
+    single_time, single_results = timed(lambda texts: [monitor.find_join_username(t) for t in texts], corpus)
+    batch_time, batch_results = timed(monitor.JOIN_MATCHER.match_batch, corpus)
+
+    if not (legacy_results == single_results == batch_results):
+        mismatches = sum(1 for a, b in zip(legacy_results, batch_results) if a != b)
+        print(f"[BENCH] ❌ Results differ from legacy implementation on {mismatches} message(s)")
+        sys.exit(1)
+
+    matches = sum(1 for r in batch_results if r)
+    print(f"[BENCH] Corpus: {len(corpus)} messages, {matches} join matches")
+    for label, elapsed in (("legacy loop", legacy_time), ("find_join_username", single_time), ("match_batch", batch_time)):
+        rate = len(corpus) / elapsed if elapsed else float("inf")
+        print(f"[BENCH] {label:<20} {elapsed * 1000:9.1f} ms  {rate:12,.0f} msg/s  x{legacy_time / elapsed:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Offline replay benchmark for the channel scan pipeline.
+
+Serves Discord channel pages from fixtures through context.route and drives the
+real scan_channel path (navigation, readiness wait, extraction, high-water
+filtering, join matching, detection processing) against them. No network or
+Discord session is needed.
+
+Fixtures are synthetic by default: every round serves each channel with a fresh
+page of newer messages, so each visit sees new traffic. --fixtures-dir replays
+HTML captured from live channels instead; --record captures it from the
+channels in DISCORD_CHANNEL_URLS using the saved storage state.
+
+Usage:
+    python benchmarks/bench_replay.py [--channels 10] [--messages 50] [--join-ratio 0.05] [--rounds 3]
+    python benchmarks/bench_replay.py --record --fixtures-dir fixtures/
+    python benchmarks/bench_replay.py --fixtures-dir fixtures/
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Replays measure the pipeline, not the production navigation budget
+os.environ.setdefault("MAX_OPERATIONS_PER_HOUR", "1000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
+os.environ.setdefault("RATE_LIMIT_DELAY", "0")
+os.environ.setdefault("METRICS_ENABLED", "1")
+os.environ.setdefault("CACHE_PATH", os.path.join(tempfile.mkdtemp(), "bench_cache.jsonl"))
+# Fixture pages are static documents with no client router, so in-app switches
+# cannot work; every visit is served as a full document load
+os.environ.setdefault("NAVIGATION_MODE", "goto")
+
+from playwright.async_api import async_playwright
+
+import playwright_discord_monitor as monitor
+from bench_browser_profile import resource_usage
+from discord_fixtures import BASE_SNOWFLAKE, build_messages, render_channel_html
+
+GUILD_ID = 1039659131067449496
+
+
+def channel_url_for(index):
+    return f"https://discord.com/channels/{GUILD_ID}/{1100000000000000000 + index}"
+
+
+class SyntheticFixtures:
+    """Serve each channel with newer messages on every visit"""
+
+    def __init__(self, channels, messages, join_ratio):
+        self.urls = [channel_url_for(i) for i in range(channels)]
+        self.messages = messages
+        self.join_ratio = join_ratio
+        self.visits = {}
+
+    def page_for(self, url):
+        index = self.urls.index(url)
+        visit = self.visits.get(url, 0)
+        self.visits[url] = visit + 1
+        channel_id = url.rsplit("/", 1)[1]
+        first_id = BASE_SNOWFLAKE + visit * self.messages * len(self.urls) + index * self.messages
+        messages = build_messages(self.messages, self.join_ratio, seed=index * 100003 + visit, first_id=first_id)
+        return render_channel_html("Replay Server", f"welcome-{index}", channel_id, messages)
+
+
+class RecordedFixtures:
+    """Serve captured channel HTML, named <guild_id>_<channel_id>.html"""
+
+    def __init__(self, fixtures_dir):
+        self.pages = {}
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "*_*.html"))):
+            guild_id, channel_id = os.path.basename(path)[:-len(".html")].split("_", 1)
+            with open(path, "r", encoding="utf-8") as f:
+                self.pages[f"https://discord.com/channels/{guild_id}/{channel_id}"] = f.read()
+        self.urls = list(self.pages)
+
+    def page_for(self, url):
+        return self.pages[url]
+
+
+async def record_fixtures(fixtures_dir):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    async with async_playwright() as p:
+        browser = await monitor.launch_monitor_browser(p)
+        context = await monitor.new_monitor_context(browser)
+        page = await monitor.new_monitor_page(context)
+        for url in monitor.load_channel_urls():
+            ids = monitor.parse_channel_url(url)
+            if not ids:
+                continue
+            await monitor.open_channel(page, url)
+            path = os.path.join(fixtures_dir, f"{ids[0]}_{ids[1]}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(await page.content())
+            print(f"[BENCH] 💾 Recorded {url} -> {path}")
+        await context.close()
+        await browser.close()
+
+
+async def replay(args):
+    fixtures = (RecordedFixtures(args.fixtures_dir) if args.fixtures_dir
+                else SyntheticFixtures(args.channels, args.messages, args.join_ratio))
+    if not fixtures.urls:
+        print("[BENCH] ⚠️ No fixtures to replay.")
+        return
+
+    async with async_playwright() as p:
+        browser = await monitor.launch_monitor_browser(p)
+        context = await browser.new_context()
+
+        async def serve(route):
+            url = route.request.url.split("?", 1)[0].rstrip("/")
+            if route.request.resource_type == "document" and url in fixtures.urls:
+                await route.fulfill(status=200, content_type="text/html", body=fixtures.page_for(url))
+            else:
+                await route.abort()
+
+        await context.route("**/*", serve)
+        pages = [await monitor.new_monitor_page(context) for _ in range(min(args.pages, len(fixtures.urls)))]
+
+        queue = asyncio.Queue()
+        for _ in range(args.rounds):
+            for url in fixtures.urls:
+                queue.put_nowait(url)
+
+        totals = {"messages": 0, "detections": 0}
+
+        async def worker(page):
+            while not queue.empty():
+                result = await monitor.scan_channel(page, queue.get_nowait())
+                totals["messages"] += result.new_messages
+                totals["detections"] += result.detections
+
+        _, cpu_before = resource_usage()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(page) for page in pages))
+        elapsed = time.perf_counter() - started
+        rss, cpu_after = resource_usage()
+
+        await context.close()
+        await browser.close()
+
+    visits = len(fixtures.urls) * args.rounds
+    print(f"[BENCH] {visits} channel visits on {len(pages)} page(s) in {elapsed:.2f} s")
+    print(f"[BENCH] {totals['messages'] / elapsed:,.1f} messages/s | {totals['detections'] / elapsed:,.2f} detections/s "
+          f"({totals['messages']} messages, {totals['detections']} detections)")
+    _, stages = monitor.metrics.summary()
+    for stage, (mean, count) in sorted(stages.items()):
+        print(f"[BENCH]   {stage:<12} mean {mean * 1000:8.1f} ms over {count} run(s)")
+    if rss is not None:
+        print(f"[BENCH] Browser RSS {rss / 1024 / 1024:.1f} MiB | browser CPU {cpu_after - cpu_before:.1f} s")
+    print(f"[BENCH] Queued notifications: {len(monitor.notification_queue.backlog)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=50, help="messages per channel page")
+    parser.add_argument("--join-ratio", type=float, default=0.05)
+    parser.add_argument("--rounds", type=int, default=3, help="visits per channel")
+    parser.add_argument("--pages", type=int, default=monitor.SCAN_CONCURRENCY)
+    parser.add_argument("--fixtures-dir", help="replay recorded HTML fixtures from this directory")
+    parser.add_argument("--record", action="store_true", help="record live channels into --fixtures-dir")
+    args = parser.parse_args()
+
+    # Scan the whole fixture page so --messages controls the per-visit workload
+    monitor.MESSAGES_PER_CHANNEL_SCAN = max(monitor.MESSAGES_PER_CHANNEL_SCAN, args.messages)
+    if args.record:
+        if not args.fixtures_dir:
+            parser.error("--record needs --fixtures-dir")
+        asyncio.run(record_fixtures(args.fixtures_dir))
+    else:
+        asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
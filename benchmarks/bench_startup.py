@@ -0,0 +1,59 @@
+"""Compare time-to-first-scan of a cold and a warm persistent browser profile.
+
+The first run starts from an empty user-data directory (seeded from the saved
+storage state), the following runs reuse it, so Discord's HTTP cache and
+service worker are already populated.
+
+Usage: python benchmarks/bench_startup.py [--warm-runs 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Benchmark runs should not wait on the production navigation budget
+os.environ.setdefault("MAX_OPERATIONS_PER_HOUR", "100000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000")
+os.environ.setdefault("RATE_LIMIT_DELAY", "0")
+os.environ.setdefault("CACHE_PATH", os.path.join(tempfile.mkdtemp(), "bench_cache.jsonl"))
+os.environ["BROWSER_USER_DATA_DIR"] = os.path.join(tempfile.mkdtemp(), "profile")
+
+from playwright.async_api import async_playwright
+
+import playwright_discord_monitor as monitor
+
+
+async def time_to_first_scan(p, channel_url):
+    started = time.perf_counter()
+    context, warm = await monitor.launch_persistent_monitor_context(p)
+    try:
+        page = await monitor.new_monitor_page(context)
+        await monitor.scan_channel(page, channel_url)
+    finally:
+        await context.close()
+    return time.perf_counter() - started, warm
+
+
+async def run(args):
+    channel_urls = monitor.load_channel_urls()
+    if not channel_urls:
+        print("[BENCH] ⚠️ No channel URLs configured. Set DISCORD_CHANNEL_URLS.")
+        return
+
+    async with async_playwright() as p:
+        for _ in range(1 + args.warm_runs):
+            elapsed, warm = await time_to_first_scan(p, channel_urls[0])
+            print(f"[BENCH] {'warm' if warm else 'cold':<5} start: first scan after {elapsed:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--warm-runs", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure welcome template lookup cost as the number of server rules grows.
+
+Compares the automaton-backed WelcomeTemplates registry against a linear scan
+that tests every rule keyword with a substring check, as the old if/elif chain did.
+
+Usage: python benchmarks/bench_welcome_templates.py [--rules 10,100,1000] [--lookups 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import playwright_discord_monitor as monitor
+
+
+def build_config(rule_count):
+    config = dict(monitor.DEFAULT_WELCOME_TEMPLATES)
+    extra = [
+        {"keywords": [f"server{i:05d}"], "template": f"Welcome {{username}} to server {i}!"}
+        for i in range(rule_count)
+    ]
+    config["server_rules"] = extra + config["server_rules"]
+    return config
+
+
+def linear_render(config, username, server_name, channel_name):
+    server_lower, channel_lower = server_name.lower(), channel_name.lower()
+    for rules, text in ((config["server_rules"], server_lower), (config["channel_rules"], channel_lower)):
+        for rule in rules:
+            if any(keyword in text for keyword in rule["keywords"]):
+                return rule["template"].format(username=username, server_name=server_name)
+    return config["default"].format(username=username, server_name=server_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=lambda v: [int(x) for x in v.split(",")], default=[10, 100, 1000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    for rule_count in args.rules:
+        config = build_config(rule_count)
+        registry = monitor.WelcomeTemplates(config)
+        # Detections repeat the same few server/channel pairs, as a live monitor does
+        pairs = [(f"Community server{rng.randrange(rule_count * 2):05d}", rng.choice(monitor.WELCOME_CHANNEL_KEYWORDS))
+                 for _ in range(50)]
+        lookups = [(f"user{i}",) + rng.choice(pairs) for i in range(args.lookups)]
+
+        start = time.perf_counter()
+        linear = [linear_render(config, *lookup) for lookup in lookups]
+        linear_time = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = [registry.render(*lookup) for lookup in lookups]
+        compiled_time = time.perf_counter() - start
+
+        if linear != compiled:
+            print(f"[BENCH] ❌ Rendered messages differ at {rule_count} rules")
+            sys.exit(1)
+        print(f"[BENCH] {rule_count:>5} rules: linear {linear_time / args.lookups * 1e6:8.2f} µs/lookup | "
+              f"registry {compiled_time / args.lookups * 1e6:6.2f} µs/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Synthetic Discord channel pages for offline benchmarks.
+
+The markup mirrors the parts of Discord's web client the monitor reads: the
+chat-messages list, list items carrying the message snowflake in their id and
+data-list-item-id, the message header username and the messageContent node.
+"""
+import html
+import random
+
+CHAT_LINES = [
+    "lol that's hilarious",
+    "anyone know when the next update drops?",
+    "gm everyone",
+    "check out my latest render, took me 3 hours",
+    "the server is lagging again for me",
+    "can someone help me with the staking dashboard? it keeps timing out",
+    "imagine paying gas fees on a sunday",
+    "that prompt is wild, what settings did you use",
+    "brb grabbing food",
+    "has anyone tried the new beta build on mobile?",
+]
+
+JOIN_LINES = [
+    "Welcome @{name}!",
+    "{name} has joined",
+    "please welcome {name}",
+    "{name} joined the server",
+    "welcome <@!{id}> to Melonly!",
+]
+
+BASE_SNOWFLAKE = 1200000000000000000
+
+
+def build_messages(count, join_ratio, seed=1234, first_id=BASE_SNOWFLAKE):
+    """Return a list of {id, author, text} dicts, oldest first"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        message_id = str(first_id + i)
+        if rng.random() < join_ratio:
+            name = f"user{seed}_{i}"
+            text = rng.choice(JOIN_LINES).format(name=name, id=first_id + i)
+            author = "Welcome Bot"
+        else:
+            text = rng.choice(CHAT_LINES)
+            author = f"member{rng.randrange(50)}"
+        messages.append({"id": message_id, "author": author, "text": text})
+    return messages
+
+
+def render_channel_html(server_name, channel_name, channel_id, messages):
+    """Render a channel page in the shape of Discord's message list"""
+    items = []
+    previous_author = None
+    for message in messages:
+        header = ""
+        if message["author"] != previous_author:
+            header = (
+                '<h3 class="header_abc12"><span class="username_f9f2e6">'
+                f'{html.escape(message["author"])}</span></h3>'
+            )
+        previous_author = message["author"]
+        item_id = f"chat-messages-{channel_id}-{message['id']}"
+        items.append(
+            f'<li id="{item_id}" class="messageListItem_d5deea" '
+            f'data-list-item-id="chat-messages___{item_id}">'
+            f'<div class="message_d5deea">{header}'
+            f'<div id="message-content-{message["id"]}" class="markup_f8f345 messageContent_f9f2e6">'
+            f'{html.escape(message["text"])}</div></div></li>'
+        )
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>#{html.escape(channel_name)} | {html.escape(server_name)} - Discord</title>"
+        "</head><body><div id=\"app-mount\">"
+        f'<nav aria-label="{html.escape(server_name)} (server)">'
+        f'<header class="header_f37cb1"><h2 class="name_f37cb1">{html.escape(server_name)}</h2></header></nav>'
+        '<main class="chatContent_f75fb0">'
+        f'<section aria-label="Channel header"><h1 class="title_fc4f04">{html.escape(channel_name)}</h1></section>'
+        '<ol data-list-id="chat-messages" class="scrollerInner_e2e187">'
+        + "".join(items)
+        + "</ol></main></div></body></html>"
+    )
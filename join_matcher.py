@@ -0,0 +1,34 @@
+"""Join-pattern matching, kept free of bot and browser imports.
+
+Catch-up process-pool workers unpickle JoinMatcher from here, so they only
+need `re` rather than discord.py, Playwright and the bot's startup code.
+"""
+import re
+
+
+class JoinMatcher:
+    """Precompiled join-pattern matcher, built once and reused for every message"""
+
+    def __init__(self, patterns, keywords):
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        # Cheap literal prefilter: most chat lines contain none of the keywords
+        self.prefilter = re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+    def match(self, message_content):
+        """Return the username/ID of the first matching pattern, or None"""
+        if not message_content or not self.prefilter.search(message_content):
+            return None
+        for pattern in self.patterns:
+            match = pattern.search(message_content)
+            if match:
+                if len(match.groups()) >= 2 and match.group(2).isdigit():
+                    return f"User ID: {match.group(2)}"
+                elif len(match.groups()) >= 2:
+                    return match.group(2)
+                else:
+                    return match.group(1)
+        return None
+
+    def match_batch(self, texts):
+        """Match a list of message texts, returning results in the same order"""
+        return [self.match(text) for text in texts]
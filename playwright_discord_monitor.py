@@ -4,9 +4,20 @@ import asyncio
 import json
 import os
 import time
+import threading
+import heapq
+import base64
+import hashlib
+import string
+from functools import lru_cache
+from array import array
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from aiohttp import web
 from playwright.async_api import async_playwright
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque, namedtuple
 from dotenv import load_dotenv
+from join_matcher import JoinMatcher
 
 load_dotenv()
 
@@ -32,6 +43,8 @@ print(f"[DEBUG] Auth token available: {'YES' if DISCORD_STORAGE_STATE else 'NO'}
 
 # NOTIFICATION CHANNEL (where bot sends you updates)
 NOTIFICATION_CHANNEL_ID = 1255771048889286703
+# Detection notifications arriving within this window are merged into one message
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "3"))
 
 # WELCOME CHANNEL KEYWORDS FOR SMART DETECTION
 WELCOME_CHANNEL_KEYWORDS = [
@@ -41,6 +54,15 @@ WELCOME_CHANNEL_KEYWORDS = [
 ]
 
 # JOIN PATTERNS TO DETECT
+# Discord-specific patterns: the wording of Discord's own join messages and
+# welcome bots. Channels the prefilter gives a reduced scan only run these.
+DISCORD_JOIN_PATTERNS = [
+    r"welcome to \*([^*]+)\* <@!(\d+)>!",
+    r"welcome to ([^!]+)! we are at (\d+) members",
+    r"welcome <@!(\d+)> to ([^!]+)!",
+    r"([^!]+) joined the server",
+    r"welcome ([^!]+) to ([^!]+)"
+]
 JOIN_PATTERNS = [
     r"(welcome|joined|just arrived|say hi to|new member|hey everyone welcome) @?([^\s#@]+)",
     r"(please welcome|introduce yourself to) @?([^\s#@]+)",
@@ -51,12 +73,14 @@ JOIN_PATTERNS = [
     r"@?([^\s#@]+) (joined|arrived) (validator|node|staking) (community|network)",
     r"(ethereum|eth) (validator|node|operator) @?([^\s#@]+) (joined|welcome)",
     r"(new member|welcome) @?([^\s#@]+) (ethereum|eth|blockchain) (community|network)",
-    # Discord-specific patterns
-    r"welcome to \*([^*]+)\* <@!(\d+)>!",
-    r"welcome to ([^!]+)! we are at (\d+) members",
-    r"welcome <@!(\d+)> to ([^!]+)!",
-    r"([^!]+) joined the server",
-    r"welcome ([^!]+) to ([^!]+)"
+] + DISCORD_JOIN_PATTERNS
+
+# Every JOIN_PATTERNS entry contains at least one of these literals, so a message
+# without any of them can be rejected without running the full patterns.
+# Keep this list in sync when adding patterns.
+JOIN_KEYWORDS = [
+    "welcome", "joined", "arrived", "say hi to", "new member",
+    "introduce yourself to", "is here", "validator", "staking node", "node operator"
 ]
 
 # TARGET SERVERS TO MONITOR
@@ -64,22 +88,213 @@ TARGET_SERVERS = [
     "melonly", "midjourney", "BASI AI", "roblox"
 ]
 
+# CHANNEL PREFILTER
+# Once a channel's name is known it is classified, and the result cached per URL:
+#   full       - channel name has a WELCOME_CHANNEL_KEYWORDS keyword: all JOIN_PATTERNS
+#   reduced    - a TARGET_SERVERS server, other channel: DISCORD_JOIN_PATTERNS only
+#   infrequent - anything else: DISCORD_JOIN_PATTERNS, polled INFREQUENT_INTERVAL_FACTOR x less often
+CHANNEL_PREFILTER_ENABLED = os.getenv("CHANNEL_PREFILTER_ENABLED", "1") == "1"
+INFREQUENT_INTERVAL_FACTOR = float(os.getenv("INFREQUENT_INTERVAL_FACTOR", "4"))
+
+# WELCOME MESSAGE TEMPLATES
+# Server rules are tried before channel rules, each in list order; a rule applies
+# when any of its keywords occurs in the lowercased server/channel name. Templates
+# may use {username}, {server_name} and {channel_name}. Point WELCOME_TEMPLATES_PATH
+# at a JSON file with the same shape to replace these defaults.
+WELCOME_TEMPLATES_PATH = os.getenv("WELCOME_TEMPLATES_PATH", "welcome_templates.json")
+DEFAULT_WELCOME_TEMPLATES = {
+    "server_rules": [
+        {"keywords": ["melonly"], "template": (
+            "🌟 Welcome {username} to Melonly! "
+            "Great to have you join our community! "
+            "Feel free to introduce yourself and ask any questions. "
+            "We're excited to see what you'll bring to the server! 🚀"
+        )},
+        {"keywords": ["midjourney"], "template": (
+            "🎨 Welcome {username} to the Midjourney community! "
+            "Ready to explore the world of AI-generated art? "
+            "Share your creations, get inspired, and connect with fellow artists. "
+            "Let's create something amazing together! ✨"
+        )},
+        {"keywords": ["basi", "ai"], "template": (
+            "🤖 Welcome {username} to the AI community! "
+            "Excited to have another AI enthusiast join {server_name}! "
+            "Whether you're building, learning, or exploring AI, "
+            "this is the perfect place to connect and grow. "
+            "Let's push the boundaries of what's possible! 🚀"
+        )},
+        {"keywords": ["roblox"], "template": (
+            "🎮 Welcome {username} to the Roblox community! "
+            "Ready to build, play, and create amazing experiences? "
+            "Connect with fellow developers and gamers. "
+            "Let's make some incredible games together! 🎯"
+        )},
+    ],
+    "channel_rules": [
+        {"keywords": ["general"], "template": (
+            "👋 Hey {username}! Welcome to {server_name}! "
+            "Great to have you here. Feel free to introduce yourself and ask any questions! 🚀"
+        )},
+        {"keywords": ["welcome"], "template": (
+            "🎉 Welcome {username} to {server_name}! "
+            "We're so excited you've joined us! "
+            "Take a look around, introduce yourself, and make some new friends. "
+            "This community is amazing and you're going to love it here! 💫"
+        )},
+        {"keywords": ["introductions"], "template": (
+            "🌟 Welcome {username} to {server_name}! "
+            "This is the perfect place to introduce yourself to the community. "
+            "Tell us a bit about yourself and what brings you here. "
+            "We can't wait to get to know you better! 🤝"
+        )},
+    ],
+    "default": (
+        "🎊 Welcome {username} to {server_name}! "
+        "You're joining an amazing community of people. "
+        "Feel free to explore, ask questions, and connect with fellow members. "
+        "We're glad you're here and can't wait to see what you'll contribute! 🚀"
+    ),
+}
+
 # RATE LIMITING FOR STEALTH
-RATE_LIMIT_DELAY = 2
-MAX_OPERATIONS_PER_HOUR = 50
+# Navigations are spaced RATE_LIMIT_DELAY apart and drawn from a token bucket
+# holding up to RATE_LIMIT_BURST tokens, refilled at MAX_OPERATIONS_PER_HOUR
+RATE_LIMIT_DELAY = float(os.getenv("RATE_LIMIT_DELAY", "2"))
+MAX_OPERATIONS_PER_HOUR = int(os.getenv("MAX_OPERATIONS_PER_HOUR", "50"))
+MAX_NOTIFICATIONS_PER_HOUR = int(os.getenv("MAX_NOTIFICATIONS_PER_HOUR", "300"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+# Both budgets refill continuously, so a zero or negative rate could never grant a token
+if MAX_OPERATIONS_PER_HOUR <= 0 or MAX_NOTIFICATIONS_PER_HOUR <= 0:
+    raise ValueError("MAX_OPERATIONS_PER_HOUR and MAX_NOTIFICATIONS_PER_HOUR must be positive")
 
 # CHANNEL POLLING CONFIG
-# Prefer providing a comma-separated env var DISCORD_CHANNEL_URLS; falls back to this list
+# Prefer providing a comma-separated env var DISCORD_CHANNEL_URLS; falls back to this list.
+# Channels the bot account can see are read from gateway events instead of the browser;
+# override per channel with DISCORD_CHANNEL_SOURCES="<channel_id>=gateway|playwright,..."
 CHANNEL_URLS = [
     # Example: "https://discord.com/channels/1039659131067449496/1039661470960595054",
 ]
 POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "30"))
+# Adaptive polling: each channel starts at POLL_INTERVAL_SECONDS and is then
+# polled about once per expected event, within these bounds
+MIN_POLL_INTERVAL_SECONDS = int(os.getenv("MIN_POLL_INTERVAL_SECONDS", "10"))
+MAX_POLL_INTERVAL_SECONDS = int(os.getenv("MAX_POLL_INTERVAL_SECONDS", "600"))
+ACTIVITY_EWMA_ALPHA = float(os.getenv("ACTIVITY_EWMA_ALPHA", "0.3"))
+DETECTION_ACTIVITY_WEIGHT = float(os.getenv("DETECTION_ACTIVITY_WEIGHT", "5"))
 MESSAGES_PER_CHANNEL_SCAN = int(os.getenv("MESSAGES_PER_CHANNEL_SCAN", "5"))
+# Catch-up matching: a scan with at least CATCHUP_THRESHOLD new messages (after
+# downtime or a large backfill) is matched off the event loop in chunks of
+# CATCHUP_CHUNK_SIZE on a pool of CATCHUP_WORKERS. "thread" keeps the loop
+# responsive; "process" also spreads matching across cores, using spawned
+# workers (multiprocessing re-runs this script's top level once per worker)
+CATCHUP_THRESHOLD = int(os.getenv("CATCHUP_THRESHOLD", "500"))
+CATCHUP_CHUNK_SIZE = int(os.getenv("CATCHUP_CHUNK_SIZE", "1000"))
+CATCHUP_EXECUTOR = os.getenv("CATCHUP_EXECUTOR", "thread").strip().lower()
+CATCHUP_WORKERS = int(os.getenv("CATCHUP_WORKERS", str(os.cpu_count() or 2)))
+# Number of pages polling channels in parallel within the one browser context
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "3"))
+# "poll" re-visits every channel each cycle; "push" keeps one page open per channel
+# and streams newly appended messages back through an in-page MutationObserver
+MONITOR_MODE = os.getenv("MONITOR_MODE", "poll").strip().lower()
+MESSAGE_CONTENT_SELECTOR = '[class*="messageContent"]'
+# "spa" loads the Discord client once per page and then switches channels inside it;
+# "goto" does a full document load for every channel visit
+NAVIGATION_MODE = os.getenv("NAVIGATION_MODE", "spa").strip().lower()
+# After navigation, scan as soon as the message list is present and its last item
+# has been stable for READY_STABLE_MS, giving up after READY_TIMEOUT_SECONDS
+NAVIGATION_TIMEOUT_SECONDS = int(os.getenv("NAVIGATION_TIMEOUT_SECONDS", "30"))
+READY_TIMEOUT_SECONDS = float(os.getenv("READY_TIMEOUT_SECONDS", "10"))
+READY_STABLE_MS = int(os.getenv("READY_STABLE_MS", "500"))
+# "batched" reads the latest messages in one evaluate call; "locator" is the
+# previous one-round-trip-per-message path, kept for timing comparisons
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "batched").strip().lower()
+
+# BROWSER PROFILE
+# "lightweight" runs headless without GPU and aborts images, media and fonts, since
+# only message text is read; "full" is the previous headed launch configuration
+BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "lightweight").strip().lower()
+BLOCKED_RESOURCE_TYPES = set(os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font,texttrack").split(","))
+BASE_BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor"
+]
+BROWSER_PROFILES = {
+    "full": {"headless": False, "args": BASE_BROWSER_ARGS, "block_resources": False},
+    "lightweight": {
+        "headless": True,
+        "args": BASE_BROWSER_ARGS + [
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--mute-audio",
+            "--blink-settings=imagesEnabled=false"
+        ],
+        "block_resources": True,
+    },
+}
+DISABLE_ANIMATIONS_SCRIPT = """
+document.addEventListener("DOMContentLoaded", () => {
+    const style = document.createElement("style");
+    style.textContent = "*, *::before, *::after { animation: none !important; transition: none !important; }";
+    document.head.appendChild(style);
+});
+"""
+
+# METRICS
+# Off by default; when enabled, exposed on 127.0.0.1:METRICS_PORT/metrics (Prometheus)
+# and/or dumped to METRICS_JSON_PATH every METRICS_DUMP_SECONDS, and summarised by !metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").strip().lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_JSON_PATH = os.getenv("METRICS_JSON_PATH", "")
+METRICS_DUMP_SECONDS = int(os.getenv("METRICS_DUMP_SECONDS", "60"))
+
+# BROWSER LIFECYCLE
+# A persistent profile directory keeps the HTTP cache and service workers between
+# runs (set BROWSER_USER_DATA_DIR="" for a fresh context each start). Playwright
+# routing disables the HTTP cache and never sees service-worker requests, so the
+# persistent path does not route: the lightweight profile blocks images through
+# its --blink-settings launch flag only, and media, fonts and text tracks are
+# downloaded. Use BROWSER_USER_DATA_DIR="" to block all BLOCKED_RESOURCE_TYPES
+# at the cost of a cold cache every start.
+# The profile is (re)seeded from STORAGE_STATE_PATH whenever that file is newer
+# than the last seeding, so regenerating discordState.json after the session
+# expires logs the profile back in; deleting the directory also forces a reseed.
+# Pages are replaced after PAGE_RECYCLE_NAVIGATIONS scans; a dead context is
+# relaunched up to MAX_CONTEXT_RESTARTS times.
+BROWSER_USER_DATA_DIR = os.getenv("BROWSER_USER_DATA_DIR", "browser_profile")
+PAGE_RECYCLE_NAVIGATIONS = int(os.getenv("PAGE_RECYCLE_NAVIGATIONS", "200"))
+MAX_CONTEXT_RESTARTS = int(os.getenv("MAX_CONTEXT_RESTARTS", "10"))
+# Marker in the profile directory recording which storage state was seeded last
+SEED_MARKER_NAME = ".seeded_storage_state"
+# Applies a seeding once per origin (keyed by its stamp) so later token
+# rotations by Discord are not overwritten on every page load
+SEED_LOCAL_STORAGE_SCRIPT = """
+(() => {
+    if (location.origin !== %s) return;
+    const stamp = %s;
+    if (localStorage.getItem("__monitorSeededAt") === stamp) return;
+    for (const [name, value] of Object.entries(%s)) localStorage.setItem(name, value);
+    localStorage.setItem("__monitorSeededAt", stamp);
+})();
+"""
 
 # STORAGE STATE (Playwright session)
 STORAGE_STATE_PATH = os.getenv("DISCORD_STORAGE_STATE", "discordState.json")
 print(f"[DEBUG] Storage state path: {STORAGE_STATE_PATH} | Exists: {os.path.exists(STORAGE_STATE_PATH)}")
 
+# CACHE STORAGE
+# Append-only JSONL log; rewritten (atomically) once it holds more than
+# CACHE_COMPACT_MIN_RECORDS records and twice the live entry count
+CACHE_PATH = os.getenv("CACHE_PATH", "playwright_monitor_cache.jsonl")
+LEGACY_CACHE_PATH = "playwright_monitor_cache.json"
+CACHE_COMPACT_MIN_RECORDS = int(os.getenv("CACHE_COMPACT_MIN_RECORDS", "10000"))
+# Detection dedup keys are kept for at most DEDUP_TTL_SECONDS and DEDUP_MAX_ENTRIES
+# entries (~170 bytes each, ~17 MB at the default); the oldest are evicted first
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
+DEDUP_TTL_SECONDS = int(os.getenv("DEDUP_TTL_SECONDS", str(30 * 24 * 3600)))
+
 def load_channel_urls():
     env_urls = os.getenv("DISCORD_CHANNEL_URLS", "").strip()
     urls = []
@@ -103,115 +318,613 @@ intents.members = True
 
 client = discord.Client(intents=intents)
 
+class Timer:
+    """Context manager measuring a stage; records to metrics only when enabled"""
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        if self.metrics.enabled:
+            self.metrics.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+class Metrics:
+    """Thread-safe counters and fixed-bucket histograms for the scan pipeline.
+
+    When disabled, inc() and observe() return immediately and timers only take
+    two perf_counter() readings.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def timer(self, stage, **labels):
+        """Time a pipeline stage into the monitor_stage_seconds histogram"""
+        return Timer(self, "monitor_stage_seconds", dict(labels, stage=stage))
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            escaped.append(f'{key}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        family = None
+        with self.lock:
+            # Series are sorted by name, so each family's TYPE line precedes its samples
+            for (name, labels), value in sorted(self.counters.items()):
+                if name != family:
+                    family = name
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{self.format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name != family:
+                    family = name
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{self.format_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{name}_sum{self.format_labels(labels)} {histogram['sum']}")
+                lines.append(f"{name}_count{self.format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        with self.lock:
+            return {
+                "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self.counters.items()],
+                "histograms": [
+                    {"name": n, "labels": dict(l), "sum": h["sum"], "count": h["count"],
+                     "buckets": dict(zip(map(str, self.BUCKETS), h["buckets"]))}
+                    for (n, l), h in self.histograms.items()
+                ],
+            }
+
+    def summary(self):
+        """Totals per counter and mean duration per stage, across all channels"""
+        counters = defaultdict(float)
+        stages = defaultdict(lambda: [0.0, 0])
+        with self.lock:
+            for (name, _), value in self.counters.items():
+                counters[name] += value
+            for (name, labels), histogram in self.histograms.items():
+                stage = dict(labels).get("stage", name)
+                stages[stage][0] += histogram["sum"]
+                stages[stage][1] += histogram["count"]
+        return counters, {stage: (total / count, count) for stage, (total, count) in stages.items() if count}
+
+metrics = Metrics(METRICS_ENABLED)
+
+async def start_metrics_exporters():
+    """Serve /metrics over HTTP and/or dump JSON periodically, as configured"""
+    if not METRICS_ENABLED:
+        return
+    if METRICS_PORT:
+        async def handle_metrics(request):
+            return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", METRICS_PORT).start()
+        print(f"[METRICS] 📈 Prometheus endpoint on http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_JSON_PATH:
+        async def dump_json():
+            while True:
+                await asyncio.sleep(METRICS_DUMP_SECONDS)
+                tmp_path = f"{METRICS_JSON_PATH}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(metrics.to_json(), f)
+                os.replace(tmp_path, METRICS_JSON_PATH)
+
+        asyncio.get_running_loop().create_task(dump_json())
+        print(f"[METRICS] 📈 Dumping JSON metrics to {METRICS_JSON_PATH} every {METRICS_DUMP_SECONDS}s")
+
+class DedupCache:
+    """Bounded dedup set of 64-bit key hashes with TTL and oldest-first eviction.
+
+    Each entry is a hash -> timestamp pair in an OrderedDict, about 170 bytes per
+    entry, so memory is capped at roughly DEDUP_MAX_ENTRIES * 170 bytes
+    (~17 MB at the default 100,000 entries) no matter how long the monitor runs.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key_hash(key):
+        # Stable across restarts, unlike the randomised built-in hash()
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        seen_at = self.entries.get(self.key_hash(key))
+        return seen_at is not None and time.time() - seen_at < self.ttl_seconds
+
+    def add(self, key):
+        """Add a key and return its (hash, timestamp) for persistence"""
+        key_hash, seen_at = self.key_hash(key), time.time()
+        self.insert(key_hash, seen_at)
+        return key_hash, seen_at
+
+    def insert(self, key_hash, seen_at):
+        self.entries[key_hash] = seen_at
+        self.entries.move_to_end(key_hash)
+        self.evict()
+
+    def evict(self):
+        cutoff = time.time() - self.ttl_seconds
+        while self.entries:
+            oldest_hash, oldest_at = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_entries and oldest_at >= cutoff:
+                break
+            del self.entries[oldest_hash]
+
+    def dump(self):
+        """Pack all entries into one base64 string (hashes then timestamps)"""
+        hashes = array("Q", self.entries.keys())
+        stamps = array("d", self.entries.values())
+        return base64.b64encode(hashes.tobytes() + stamps.tobytes()).decode("ascii")
+
+    def load(self, packed):
+        raw = base64.b64decode(packed)
+        half = len(raw) // 2
+        hashes, stamps = array("Q"), array("d")
+        hashes.frombytes(raw[:half])
+        stamps.frombytes(raw[half:])
+        self.entries.update(zip(hashes, stamps))
+        self.evict()
+
 # CACHE FOR PROCESSED MESSAGES
-processed_messages = set()
+processed_messages = DedupCache(DEDUP_MAX_ENTRIES, DEDUP_TTL_SECONDS)
 known_users_per_server = defaultdict(set)
+# Newest Discord message snowflake already scanned, per channel URL
+channel_high_water = {}
+
+class CacheLog:
+    """Append-only JSONL cache log, compacted into a snapshot by atomic rename"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.records = 0
+
+    def replay(self):
+        """Yield every intact record; a torn last line from a crash is skipped"""
+        self.records = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.records += 1
+                yield record
+
+    def append(self, record):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+            if self.file.tell() and not self._ends_with_newline():
+                # Terminate a line torn by a crash so the next record stays intact
+                self.file.write("\n")
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.records += 1
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def compact(self, records):
+        """Rewrite the log as exactly `records`, replacing the old file atomically"""
+        tmp_path = f"{self.path}.tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        os.replace(tmp_path, self.path)
+        self.records = count
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+cache_log = CacheLog(CACHE_PATH)
+# The scanner thread and the bot loop both record detections; this guards the
+# dedup cache, channel marks, user sets and the log file between them
+cache_lock = threading.RLock()
+
+def cache_snapshot_records():
+    yield {"t": "dedup", "data": processed_messages.dump()}
+    for server, users in known_users_per_server.items():
+        for user in users:
+            yield {"t": "user", "server": str(server), "user": user}
+    for channel_url, message_id in channel_high_water.items():
+        yield {"t": "mark", "channel": channel_url, "id": message_id}
 
 def save_cache():
-    data = {
-        "processed_messages": list(processed_messages),
-        "known_users": {str(server): list(users) for server, users in known_users_per_server.items()}
-    }
-    with open("playwright_monitor_cache.json", "w") as f:
-        json.dump(data, f)
-    print("[CACHE] Saved to disk.")
+    """Compact the cache log down to the current in-memory state"""
+    with cache_lock:
+        cache_log.compact(cache_snapshot_records())
+    print(f"[CACHE] Compacted to {cache_log.records} records.")
+
+def maybe_compact_cache():
+    # The whole dedup set compacts into a single record
+    live_records = 1 + len(channel_high_water) + sum(len(u) for u in known_users_per_server.values())
+    if cache_log.records > max(CACHE_COMPACT_MIN_RECORDS, 2 * live_records):
+        save_cache()
 
 def load_cache():
-    global processed_messages, known_users_per_server
-    if not os.path.exists("playwright_monitor_cache.json"):
+    with cache_lock:
+        _load_cache()
+
+def _load_cache():
+    global known_users_per_server, channel_high_water
+    if not os.path.exists(CACHE_PATH) and os.path.exists(LEGACY_CACHE_PATH):
+        # One-off migration from the old whole-file JSON cache
+        with open(LEGACY_CACHE_PATH, "r") as f:
+            data = json.load(f)
+        for key in data.get("processed_messages", []):
+            processed_messages.add(key)
+        known_users_per_server = defaultdict(set, {server: set(users) for server, users in data.get("known_users", {}).items()})
+        channel_high_water = dict(data.get("channel_high_water", {}))
+        save_cache()
+        print(f"[CACHE] Migrated {LEGACY_CACHE_PATH} to {CACHE_PATH}.")
+    elif not os.path.exists(CACHE_PATH):
         print("[CACHE] No cache file found, starting fresh.")
         return
-    
-    with open("playwright_monitor_cache.json", "r") as f:
-        data = json.load(f)
-    processed_messages = set(data.get("processed_messages", []))
-    known_users_per_server = defaultdict(set, {server: set(users) for server, users in data.get("known_users", {}).items()})
-    print(f"[CACHE] Loaded: {len(processed_messages)} messages, {len(known_users_per_server)} servers.")
+    else:
+        for record in cache_log.replay():
+            kind = record.get("t")
+            if kind == "dedup":
+                processed_messages.load(record["data"])
+            elif kind == "msg":
+                processed_messages.insert(record["h"], record["ts"])
+            elif kind == "user":
+                known_users_per_server[record["server"]].add(record["user"])
+            elif kind == "mark":
+                channel_high_water[record["channel"]] = record["id"]
+    print(f"[CACHE] Loaded: {len(processed_messages)} messages, {len(known_users_per_server)} servers, {len(channel_high_water)} channel marks.")
+
+def record_processed(key):
+    """Mark a dedup key as processed and log it; returns False if it already was"""
+    with cache_lock, metrics.timer("cache_save"):
+        if key in processed_messages:
+            return False
+        key_hash, seen_at = processed_messages.add(key)
+        cache_log.append({"t": "msg", "h": key_hash, "ts": seen_at})
+        maybe_compact_cache()
+        return True
+
+def persist_high_water(channel_url):
+    with cache_lock:
+        if channel_url in channel_high_water:
+            with metrics.timer("cache_save", channel=channel_url):
+                cache_log.append({"t": "mark", "channel": channel_url, "id": channel_high_water[channel_url]})
+                maybe_compact_cache()
+
+def advance_high_water(channel_url, message_id):
+    """Record message_id as seen; returns False if it is not newer than the channel's mark"""
+    if not message_id:
+        # Without an ID there is nothing to order by, so always scan it
+        return True
+    with cache_lock:
+        last_seen = channel_high_water.get(channel_url)
+        if last_seen and int(message_id) <= int(last_seen):
+            return False
+        channel_high_water[channel_url] = message_id
+        return True
+
+JOIN_MATCHER = JoinMatcher(JOIN_PATTERNS, JOIN_KEYWORDS)
+DISCORD_JOIN_MATCHER = JoinMatcher(DISCORD_JOIN_PATTERNS, JOIN_KEYWORDS)
 
 def find_join_username(message_content):
     """Extract username from join patterns"""
-    for pattern in JOIN_PATTERNS:
-        match = re.search(pattern, message_content, re.IGNORECASE)
-        if match:
-            if len(match.groups()) >= 2 and match.group(2).isdigit():
-                return f"User ID: {match.group(2)}"
-            elif len(match.groups()) >= 2:
-                return match.group(2)
-            else:
-                return match.group(1)
-    return None
+    return JOIN_MATCHER.match(message_content)
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every keyword in a text in one pass"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [frozenset()]
+        for keyword in keywords:
+            node = 0
+            for char in keyword.lower():
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(frozenset())
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.output[node] = self.output[node] | {keyword.lower()}
+        # Breadth-first so every fail target is finished before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] | self.output[self.fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """Return the set of keywords occurring anywhere in text (case-insensitive)"""
+        found = set()
+        node = 0
+        for char in text.lower():
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if self.output[node]:
+                found |= self.output[node]
+        return found
+
+class WelcomeTemplate:
+    """A format template parsed once into literal text and field lookups"""
+
+    FIELDS = ("username", "server_name", "channel_name")
+
+    def __init__(self, source):
+        self.parts = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(source):
+            if field is not None and field not in self.FIELDS:
+                raise ValueError(f"Unknown welcome template field {{{field}}} in {source[:40]!r}")
+            if format_spec or conversion:
+                # render() substitutes plain values, so these would be silently dropped
+                raise ValueError(f"Welcome template field {{{field}}} may not use a format spec or conversion in {source[:40]!r}")
+            self.parts.append((literal, field))
+
+    def render(self, **values):
+        return "".join(literal + (values[field] if field else "") for literal, field in self.parts)
+
+class RuleSet:
+    """Ordered keyword rules; the earliest rule with a keyword in the text wins
+
+    The automaton is built from the rules' own keywords rather than from
+    WELCOME_CHANNEL_KEYWORDS, so template choice and priority stay exactly as
+    configured; WELCOME_CHANNEL_KEYWORDS drives ChannelClassifier instead.
+    """
+
+    def __init__(self, rules):
+        self.templates = [WelcomeTemplate(rule["template"]) for rule in rules]
+        self.rule_for_keyword = {}
+        for index, rule in enumerate(rules):
+            for keyword in rule["keywords"]:
+                self.rule_for_keyword.setdefault(keyword.lower(), index)
+        self.automaton = KeywordAutomaton(self.rule_for_keyword)
+
+    def match(self, text):
+        found = self.automaton.find(text)
+        if not found:
+            return None
+        return self.templates[min(self.rule_for_keyword[keyword] for keyword in found)]
+
+class WelcomeTemplates:
+    """Registry resolving (server, channel) to a welcome template, cached per pair"""
+
+    def __init__(self, config):
+        self.server_rules = RuleSet(config.get("server_rules", []))
+        self.channel_rules = RuleSet(config.get("channel_rules", []))
+        self.default = WelcomeTemplate(config["default"])
+        self.select = lru_cache(maxsize=4096)(self._select)
+
+    @classmethod
+    def load(cls, path):
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            print(f"[TEMPLATES] Loaded welcome templates from {path}")
+            return cls(config)
+        return cls(DEFAULT_WELCOME_TEMPLATES)
+
+    def _select(self, server_name, channel_name):
+        return self.server_rules.match(server_name) or self.channel_rules.match(channel_name) or self.default
+
+    def render(self, username, server_name, channel_name):
+        template = self.select(server_name, channel_name)
+        return template.render(username=username, server_name=server_name, channel_name=channel_name)
+
+WELCOME_TEMPLATES = WelcomeTemplates.load(WELCOME_TEMPLATES_PATH)
 
 def get_tailored_welcome_message(username, server_name, channel_name):
     """Generate tailored welcome message based on server context"""
-    server_lower = server_name.lower()
-    channel_lower = channel_name.lower()
-    
-    # Server-specific messages
-    if "melonly" in server_lower:
-        return (
-            f"🌟 Welcome {username} to Melonly! "
-            f"Great to have you join our community! "
-            "Feel free to introduce yourself and ask any questions. "
-            "We're excited to see what you'll bring to the server! 🚀"
-        )
-    elif "midjourney" in server_lower:
-        return (
-            f"🎨 Welcome {username} to the Midjourney community! "
-            f"Ready to explore the world of AI-generated art? "
-            "Share your creations, get inspired, and connect with fellow artists. "
-            "Let's create something amazing together! ✨"
-        )
-    elif "basi" in server_lower or "ai" in server_lower:
-        return (
-            f"🤖 Welcome {username} to the AI community! "
-            f"Excited to have another AI enthusiast join {server_name}! "
-            "Whether you're building, learning, or exploring AI, "
-            "this is the perfect place to connect and grow. "
-            "Let's push the boundaries of what's possible! 🚀"
-        )
-    elif "roblox" in server_lower:
-        return (
-            f"🎮 Welcome {username} to the Roblox community! "
-            f"Ready to build, play, and create amazing experiences? "
-            "Connect with fellow developers and gamers. "
-            "Let's make some incredible games together! 🎯"
-        )
-    
-    # Channel-specific messages
-    elif "general" in channel_lower:
-        return (
-            f"👋 Hey {username}! Welcome to {server_name}! "
-            "Great to have you here. Feel free to introduce yourself and ask any questions! 🚀"
-        )
-    elif "welcome" in channel_lower:
-        return (
-            f"🎉 Welcome {username} to {server_name}! "
-            "We're so excited you've joined us! "
-            "Take a look around, introduce yourself, and make some new friends. "
-            "This community is amazing and you're going to love it here! 💫"
-        )
-    elif "introductions" in channel_lower:
-        return (
-            f"🌟 Welcome {username} to {server_name}! "
-            "This is the perfect place to introduce yourself to the community. "
-            "Tell us a bit about yourself and what brings you here. "
-            "We can't wait to get to know you better! 🤝"
-        )
-    
-    # Default welcome message
-    else:
-        return (
-            f"🎊 Welcome {username} to {server_name}! "
-            "You're joining an amazing community of people. "
-            "Feel free to explore, ask questions, and connect with fellow members. "
-            "We're glad you're here and can't wait to see what you'll contribute! 🚀"
-        )
+    return WELCOME_TEMPLATES.render(username, server_name, channel_name)
+
+class ChannelClassifier:
+    """Sorts channels into full / reduced / infrequent scanning tiers by name.
+
+    Classification runs once per channel URL on the names read_channel_names
+    takes from the rendered DOM (falling back to the page title); channels
+    whose names are not known yet get the full scan.
+    """
+
+    MATCHERS = {"full": JOIN_MATCHER, "reduced": DISCORD_JOIN_MATCHER, "infrequent": DISCORD_JOIN_MATCHER}
+
+    def __init__(self, welcome_keywords, target_servers):
+        self.welcome_channels = KeywordAutomaton(welcome_keywords)
+        self.target_servers = KeywordAutomaton(target_servers)
+        self.tiers = {}
+        # Written by the scanner thread, read by bot commands
+        self.lock = threading.Lock()
+
+    def classify(self, channel_url, server_name, channel_name):
+        if not CHANNEL_PREFILTER_ENABLED:
+            return "full"
+        tier = self.tiers.get(channel_url)
+        if tier:
+            return tier
+        if channel_name == "Current Channel":
+            # Neither the DOM nor the title gave a name; retry on the next visit
+            return "full"
+        if self.welcome_channels.find(channel_name):
+            tier = "full"
+        elif self.target_servers.find(server_name):
+            tier = "reduced"
+        else:
+            tier = "infrequent"
+        with self.lock:
+            self.tiers[channel_url] = tier
+        print(f"[PREFILTER] 🏷️ #{channel_name} ({server_name}): {tier} scan")
+        return tier
+
+    def tier(self, channel_url):
+        return self.tiers.get(channel_url, "full") if CHANNEL_PREFILTER_ENABLED else "full"
+
+    def matcher(self, channel_url):
+        return self.MATCHERS[self.tier(channel_url)]
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.tiers.items())
+
+    def interval_factor(self, channel_url):
+        return INFREQUENT_INTERVAL_FACTOR if self.tier(channel_url) == "infrequent" else 1
+
+channel_classifier = ChannelClassifier(WELCOME_CHANNEL_KEYWORDS, TARGET_SERVERS)
+
+class TokenBucket:
+    """Token bucket refilled continuously at per_hour / 3600 tokens per second"""
+
+    def __init__(self, per_hour, burst, min_interval=0):
+        self.per_hour = per_hour
+        self.capacity = max(1, burst)
+        self.rate = per_hour / 3600
+        self.min_interval = min_interval
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.last_grant = None
+        self.grants = deque()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        while self.grants and now - self.grants[0] >= 3600:
+            self.grants.popleft()
+
+    def wait_time(self, now):
+        """Seconds until a token can be granted (0 if one is available now)"""
+        self.refill(now)
+        wait = 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if self.last_grant is not None:
+            wait = max(wait, self.last_grant + self.min_interval - now)
+        return max(0, wait)
+
+    def grant(self, now):
+        self.tokens -= 1
+        self.last_grant = now
+        self.grants.append(now)
+
+class RateLimiter:
+    """Async token-bucket rate limiter with one budget per operation category.
+
+    State is guarded by a threading lock and waits are plain asyncio sleeps, so
+    a single limiter can be shared by coroutines on different event loops.
+    """
+
+    def __init__(self, budgets):
+        self.buckets = {category: TokenBucket(*budget) for category, budget in budgets.items()}
+        self.lock = threading.Lock()
+
+    async def acquire(self, category):
+        """Wait until the category's budget allows one more operation"""
+        bucket = self.buckets[category]
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = bucket.wait_time(now)
+                if wait <= 0:
+                    bucket.grant(now)
+                    return
+            await asyncio.sleep(wait)
+
+    def snapshot(self):
+        """Per-category budget usage for status reporting"""
+        with self.lock:
+            now = time.monotonic()
+            report = {}
+            for category, bucket in self.buckets.items():
+                wait = bucket.wait_time(now)
+                report[category] = {
+                    "used_last_hour": len(bucket.grants),
+                    "per_hour": bucket.per_hour,
+                    "tokens": bucket.tokens,
+                    "capacity": bucket.capacity,
+                    "wait_seconds": wait,
+                }
+            return report
+
+# Browser navigations and notification sends draw from separate budgets;
+# navigations are also spaced at least RATE_LIMIT_DELAY apart
+rate_limiter = RateLimiter({
+    "navigation": (MAX_OPERATIONS_PER_HOUR, RATE_LIMIT_BURST, RATE_LIMIT_DELAY),
+    "notification": (MAX_NOTIFICATIONS_PER_HOUR, RATE_LIMIT_BURST),
+})
 
 async def send_notification(message_content, is_error=False):
     """Send notification to your notification channel"""
     try:
         notification_channel = client.get_channel(NOTIFICATION_CHANNEL_ID)
         if notification_channel:
+            await rate_limiter.acquire("notification")
             prefix = "🚨 **BOT NOTIFICATION**" if is_error else "📱 **PLAYWRIGHT MONITOR**"
             formatted_msg = f"{prefix}\n\n{message_content}"
             await notification_channel.send(formatted_msg)
@@ -224,15 +937,132 @@ async def send_notification(message_content, is_error=False):
         print(f"[ERROR] Failed to send notification: {e}")
         return False
 
+class NotificationQueue:
+    """Background notification sender.
+
+    Notifications submitted within NOTIFICATION_COALESCE_SECONDS of each other
+    are merged into as few messages as fit Discord's 2000-character limit, and
+    sends that hit a 429 or a server error are retried with backoff. submit()
+    never blocks and may be called from any thread.
+    """
+
+    def __init__(self, window, max_length=2000, max_retries=5):
+        self.window = window
+        self.max_length = max_length
+        self.max_retries = max_retries
+        self.loop = None
+        self.queue = None
+        self.task = None
+        self.backlog = []
+        self.lock = threading.Lock()
+
+    def start(self, loop):
+        """Start the sender on `loop`; calling it again while running is a no-op"""
+        if self.task and not self.task.done():
+            return
+        with self.lock:
+            self.queue = asyncio.Queue()
+            for item in self.backlog:
+                self.queue.put_nowait(item)
+            self.backlog.clear()
+            self.loop = loop
+        self.task = loop.create_task(self.run())
+
+    def submit(self, message_content, is_error=False):
+        with self.lock:
+            if self.loop is None:
+                self.backlog.append((message_content, is_error))
+                return
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (message_content, is_error))
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.window
+            while True:
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            for is_error in (True, False):
+                contents = [content for content, error in batch if error == is_error]
+                for chunk in self.pack(contents, is_error):
+                    await self.send_with_retry(chunk)
+
+    def pack(self, contents, is_error):
+        """Greedily pack notifications into messages no longer than max_length"""
+        if not contents:
+            return []
+        prefix = "🚨 **BOT NOTIFICATION**" if is_error else "📱 **PLAYWRIGHT MONITOR**"
+        separator = "\n\n━━━━━━━━━━\n\n"
+        header = f"{prefix}\n\n"
+        budget = self.max_length - len(header)
+        pieces = []
+        for content in contents:
+            # Split any single notification that is too long on its own
+            while len(content) > budget:
+                cut = content.rfind("\n", 0, budget)
+                cut = cut if cut > 0 else budget
+                pieces.append(content[:cut])
+                content = content[cut:].lstrip("\n")
+            pieces.append(content)
+        messages = []
+        current = ""
+        for piece in pieces:
+            candidate = f"{current}{separator}{piece}" if current else piece
+            if len(candidate) > budget:
+                messages.append(header + current)
+                current = piece
+            else:
+                current = candidate
+        messages.append(header + current)
+        return messages
+
+    async def send_with_retry(self, formatted_msg):
+        notification_channel = client.get_channel(NOTIFICATION_CHANNEL_ID)
+        if not notification_channel:
+            print(f"[ERROR] Could not find notification channel {NOTIFICATION_CHANNEL_ID}")
+            return False
+        for attempt in range(self.max_retries + 1):
+            await rate_limiter.acquire("notification")
+            try:
+                with metrics.timer("notification"):
+                    await notification_channel.send(formatted_msg)
+                metrics.inc("monitor_notifications_sent_total")
+                print(f"[NOTIFICATION] Sent to #{notification_channel.name}")
+                return True
+            except discord.HTTPException as e:
+                metrics.inc("monitor_notification_errors_total", status=e.status)
+                if (e.status != 429 and e.status < 500) or attempt == self.max_retries:
+                    print(f"[ERROR] Failed to send notification: {e}")
+                    return False
+                delay = getattr(e, "retry_after", None) or 2 ** attempt
+                print(f"[NOTIFICATION] ⏳ Send failed with HTTP {e.status}, retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                print(f"[ERROR] Failed to send notification: {e}")
+                return False
+
+notification_queue = NotificationQueue(NOTIFICATION_COALESCE_SECONDS)
+
+def queue_notification(message_content, is_error=False):
+    """Queue a notification for the background sender without waiting on Discord"""
+    notification_queue.submit(message_content, is_error)
+
 print("🚀 Playwright Discord Monitor setup complete!")
 
-async def process_new_user_detection(username, server_name, channel_name, message_content):
-    """Process new user detection and send welcome message"""
-    if f"{username}_{server_name}_{channel_name}" in processed_messages:
-        return
+async def process_new_user_detection(username, server_name, channel_name, message_content, message_id=None):
+    """Process new user detection and send welcome message; returns False for a repeat"""
+    # Key on the Discord message ID when known so repeat joins under the same name are kept apart
+    dedup_key = f"msg_{message_id}" if message_id else f"{username}_{server_name}_{channel_name}"
+    # Off the loop: the scanner thread may hold cache_lock through a compaction
+    if not await asyncio.to_thread(record_processed, dedup_key):
+        return False
     
     print(f"[DETECTION] 🎯 NEW USER DETECTED! Username: '{username}' in #{channel_name} ({server_name})")
-    processed_messages.add(f"{username}_{server_name}_{channel_name}")
     
     # Generate tailored welcome message
     welcome_msg = get_tailored_welcome_message(username, server_name, channel_name)
@@ -247,7 +1077,7 @@ async def process_new_user_detection(username, server_name, channel_name, messag
         f"📤 **Generated Welcome Message:**\n{welcome_msg}"
     )
     
-    await send_notification(detection_msg)
+    queue_notification(detection_msg)
     
     # Try to send welcome message to the new user
     try:
@@ -262,7 +1092,7 @@ async def process_new_user_detection(username, server_name, channel_name, messag
             f"**Message:** {welcome_msg}\n\n"
             f"**Note:** Welcome message generated and ready to send!"
         )
-        await send_notification(success_msg)
+        queue_notification(success_msg)
         
     except Exception as e:
         error_msg = (
@@ -274,145 +1104,890 @@ async def process_new_user_detection(username, server_name, channel_name, messag
             f"• Bot permissions\n"
             f"• Server settings"
         )
-        await send_notification(error_msg)
+        queue_notification(error_msg)
         print(f"[ERROR] Failed to process welcome for {username}: {e}")
-    
-    save_cache()
+    return True
 
-async def start_playwright_monitoring():
-    """Start the Playwright monitoring process"""
-    print("[MONITOR] Starting Playwright monitoring...")
-    
-    async with async_playwright() as p:
-        browser = None
-        context = None
-        page = None
-        
+def parse_titles(title_text: str):
+    # Discord title pattern often: "#channel-name - Server Name - Discord" or
+    # "Discord | #channel-name | Server Name". Split only on spaced separators
+    # so hyphenated channel names stay intact.
+    if not title_text:
+        return ("Current Server", "Current Channel")
+    # Unread indicators prefix the title: "(3) Discord | ...", "(99+) #chan - ...", "• Discord | ..."
+    title_text = re.sub(r"^\s*(?:\(\d+\+?\)|•)\s*", "", title_text)
+    parts = [p.strip() for p in re.split(r" \| | - ", title_text) if p.strip()]
+    parts = [p for p in parts if p.lower() != "discord"]
+    if parts:
+        channel_part = next((p for p in parts if p.startswith("#")), parts[0] if len(parts) >= 2 else "")
+        server_part = next((p for p in parts if p != channel_part), "")
+        channel_part = channel_part.lstrip("#").strip()
+        if channel_part:
+            return (server_part or "Current Server", channel_part or "Current Channel")
+    return ("Current Server", "Current Channel")
+
+async def handle_message_text(text, server_name, channel_name, message_id=None, matcher=JOIN_MATCHER):
+    """Run join detection on a single message text; returns the username if it is a new join"""
+    with metrics.timer("match"):
+        username = matcher.match(text)
+    if username and await report_join(username, text, server_name, channel_name, message_id):
+        return username
+    return None
+
+async def report_join(username, text, server_name, channel_name, message_id=None):
+    print(f"[PLAYWRIGHT] 🎯 JOIN PATTERN DETECTED! Username: {username}")
+    print(f"[PLAYWRIGHT] 📝 Message: {text[:120]}{'...' if len(text) > 120 else ''}")
+    return await process_new_user_detection(username, server_name, channel_name, text, message_id)
+
+catchup_pool = None
+
+def get_catchup_pool():
+    """Create the catch-up executor on first use and keep it for later backlogs"""
+    global catchup_pool
+    if catchup_pool is None:
+        if CATCHUP_EXECUTOR == "thread":
+            catchup_pool = ThreadPoolExecutor(max_workers=CATCHUP_WORKERS, thread_name_prefix="catchup")
+        else:
+            # Never fork: this process already runs the bot loop and the scanner thread
+            catchup_pool = ProcessPoolExecutor(max_workers=CATCHUP_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return catchup_pool
+
+async def match_in_pool(texts, matcher=JOIN_MATCHER):
+    """Match texts in chunks on the catch-up pool; results keep the input order"""
+    global catchup_pool
+    loop = asyncio.get_running_loop()
+    chunks = [texts[i:i + CATCHUP_CHUNK_SIZE] for i in range(0, len(texts), CATCHUP_CHUNK_SIZE)]
+    try:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(get_catchup_pool(), matcher.match_batch, chunk) for chunk in chunks)
+        )
+    except Exception as e:
+        # Broken or unusable pool; drop it so the next backlog gets a fresh one
+        print(f"[CATCHUP] ⚠️ Catch-up pool failed ({e}), matching this batch on a thread instead.")
+        if catchup_pool is not None:
+            catchup_pool.shutdown(wait=False, cancel_futures=True)
+            catchup_pool = None
+        return await asyncio.to_thread(matcher.match_batch, texts)
+    return [username for chunk in results for username in chunk]
+
+async def handle_message_batch(messages, server_name, channel_name, matcher=JOIN_MATCHER):
+    """Run join detection on scanned messages in order; returns the number of detections"""
+    messages = [m for m in messages if m["text"]]
+    if len(messages) < CATCHUP_THRESHOLD:
+        detections = 0
+        for message in messages:
+            if await handle_message_text(message["text"], server_name, channel_name, message["id"], matcher):
+                detections += 1
+        return detections
+
+    print(f"[CATCHUP] 🧵 Matching {len(messages)} backlog message(s) on the {CATCHUP_EXECUTOR} pool...")
+    with metrics.timer("catchup_match"):
+        usernames = await match_in_pool([m["text"] for m in messages], matcher)
+    detections = 0
+    for message, username in zip(messages, usernames):
+        if username and await report_join(username, message["text"], server_name, channel_name, message["id"]):
+            detections += 1
+    return detections
+
+# True once the chat list has settled for stableMs on the expected channel: either
+# its last item belongs to that channel, or the client has routed there and shows
+# the channel (list or header) with no message items, as for an empty channel or
+# one whose history the account cannot read
+CHANNEL_READY_SCRIPT = """
+({ channelId, stableMs }) => {
+    const list = document.querySelector('[data-list-id="chat-messages"]');
+    const items = list ? list.querySelectorAll('[id^="chat-messages-"]') : [];
+    const last = items.length ? items[items.length - 1].id : null;
+    let key = last;
+    if (last && channelId && !last.startsWith(`chat-messages-${channelId}-`)) key = null;
+    if (!last) {
+        const routed = !channelId || location.pathname.endsWith(`/${channelId}`);
+        const header = document.querySelector('section[aria-label="Channel header"] h1, [class*="chat"] [class*="title"] h1');
+        key = routed && (list || header) ? "empty" : null;
+    }
+    if (!key) {
+        window.__channelReadyState = null;
+        return false;
+    }
+    const now = performance.now();
+    const state = window.__channelReadyState;
+    if (!state || state.last !== key || state.count !== items.length) {
+        window.__channelReadyState = { last: key, count: items.length, since: now };
+        return false;
+    }
+    return now - state.since >= stableMs;
+}
+"""
+
+async def wait_for_channel_ready(page, channel_url):
+    """Wait until the channel's message list has rendered and settled; False on timeout"""
+    ids = parse_channel_url(channel_url)
+    try:
+        await page.wait_for_function(
+            CHANNEL_READY_SCRIPT,
+            arg={"channelId": str(ids[1]) if ids else None, "stableMs": READY_STABLE_MS},
+            polling=100,
+            timeout=READY_TIMEOUT_SECONDS * 1000,
+        )
+        return True
+    except Exception:
+        return False
+
+# Switches the Discord client to another channel without a document load: clicks
+# the sidebar link when the channel is listed, otherwise routes via pushState
+SWITCH_CHANNEL_SCRIPT = """
+(path) => {
+    const link = document.querySelector(`a[href="${path}"]`);
+    if (link) {
+        link.click();
+        return "click";
+    }
+    window.history.pushState({}, "", path);
+    window.dispatchEvent(new PopStateEvent("popstate", { state: {} }));
+    return "pushState";
+}
+"""
+
+# Server and channel names as rendered by the client
+CHANNEL_NAMES_SCRIPT = """
+() => {
+    const text = (el) => (el && el.innerText ? el.innerText.trim() : null);
+    const guildNav = document.querySelector('nav[aria-label$="(server)"]');
+    const server = guildNav
+        ? guildNav.getAttribute("aria-label").replace(/\\s*\\(server\\)$/, "").trim()
+        : text(document.querySelector('nav header h2, [class*="sidebar"] header [class*="name"]'));
+    const channel = text(document.querySelector('section[aria-label="Channel header"] h1, [class*="chat"] [class*="title"] h1'));
+    return { server: server || null, channel: channel || null };
+}
+"""
+
+def is_discord_app_loaded(page):
+    return page.url.startswith("https://discord.com/channels/")
+
+def is_at_channel(page, channel_url):
+    return page.url.split("?", 1)[0].rstrip("/") == channel_url.split("?", 1)[0].rstrip("/")
+
+async def load_channel_document(page, channel_url):
+    """Full document navigation to a channel"""
+    try:
+        with metrics.timer("navigation", channel=channel_url):
+            # Discord long-polls, so "networkidle" may never come; readiness is checked below
+            await page.goto(channel_url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_SECONDS * 1000)
+    except Exception:
+        print("[PLAYWRIGHT] ⏳ Initial load failed. Retrying with reload...")
+        metrics.inc("monitor_navigation_retries_total", channel=channel_url)
+        # The reload is a navigation of its own
+        await rate_limiter.acquire("navigation")
+        with metrics.timer("navigation", channel=channel_url):
+            await page.reload(wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_SECONDS * 1000)
+    with metrics.timer("ready", channel=channel_url) as ready_timer:
+        ready = await wait_for_channel_ready(page, channel_url)
+    return ready, ready_timer.elapsed
+
+async def switch_channel_in_app(page, channel_url):
+    """Change channel inside the already-loaded client; returns (ready, seconds)"""
+    path = "/channels/" + channel_url.split("/channels/", 1)[1]
+    with metrics.timer("navigation", channel=channel_url, mode="spa"):
+        method = await page.evaluate(SWITCH_CHANNEL_SCRIPT, path)
+    print(f"[PLAYWRIGHT] 🔀 Switched in-app via {method}")
+    with metrics.timer("ready", channel=channel_url) as ready_timer:
+        ready = await wait_for_channel_ready(page, channel_url)
+    return ready, ready_timer.elapsed
+
+async def read_channel_names(page):
+    """Server and channel names from the rendered DOM, falling back to the page title"""
+    try:
+        names = await page.evaluate(CHANNEL_NAMES_SCRIPT)
+    except Exception:
+        names = {}
+    title_server, title_channel = parse_titles(await page.title())
+    return (names.get("server") or title_server, (names.get("channel") or title_channel).lstrip("#"))
+
+async def open_channel(page, channel_url):
+    """Navigate to a channel and return its (server_name, channel_name)"""
+    await rate_limiter.acquire("navigation")
+    print(f"[PLAYWRIGHT] 🔗 Navigating to channel: {channel_url}")
+    metrics.inc("monitor_navigations_total", channel=channel_url)
+
+    ready = loaded = False
+    if NAVIGATION_MODE == "spa" and is_discord_app_loaded(page) and "/channels/" in channel_url:
+        ready, ready_seconds = await switch_channel_in_app(page, channel_url)
+        # Routed but unsettled (a slow render); a full load would not do better
+        loaded = ready or is_at_channel(page, channel_url)
+        if not loaded:
+            # The client ignored the route change; reload it properly
+            print("[PLAYWRIGHT] ↩️ In-app switch did not settle, falling back to a full load")
+            metrics.inc("monitor_spa_fallbacks_total", channel=channel_url)
+            # The full load is a second navigation and needs its own token
+            await rate_limiter.acquire("navigation")
+            metrics.inc("monitor_navigations_total", channel=channel_url)
+    if not loaded:
+        ready, ready_seconds = await load_channel_document(page, channel_url)
+
+    # Wait for messages to be present
+    if ready:
+        print(f"[PLAYWRIGHT] ✅ Channel ready in {ready_seconds:.1f}s")
+    else:
+        metrics.inc("monitor_ready_timeouts_total", channel=channel_url)
+        print(f"[PLAYWRIGHT] ⏳ Channel not stable after {ready_seconds:.1f}s, scanning what has rendered")
+    server_name, channel_name = await read_channel_names(page)
+    print(f"[PLAYWRIGHT] 📍 Now at: {server_name} / #{channel_name}")
+    return server_name, channel_name
+
+# Returns {id, text, author} for the last N message nodes in one round trip.
+# The id is the Discord message snowflake taken from the list item's
+# id/data-list-item-id; grouped follow-up messages inherit the author of the
+# nearest preceding message that has a header.
+EXTRACT_MESSAGES_SCRIPT = """
+(nodes, limit) => {
+    const authorOf = (item) => {
+        for (let el = item; el; el = el.previousElementSibling) {
+            const name = el.querySelector && el.querySelector('h3 [class*="username"]');
+            if (name) return name.innerText;
+        }
+        return null;
+    };
+    return nodes.slice(-limit).map((node) => {
+        const item = node.closest('[id^="chat-messages-"]') || node.closest('[data-list-item-id]');
+        const rawId = (item && (item.id || item.getAttribute('data-list-item-id'))) || node.id || '';
+        const match = rawId.match(/(\\d+)$/);
+        return { id: match ? match[1] : null, text: node.innerText, author: item ? authorOf(item) : null };
+    });
+}
+"""
+
+async def extract_recent_messages(page, limit):
+    """Return the last `limit` messages as dicts with id, text and author"""
+    if limit <= 0:
+        return []
+    try:
+        return await page.locator(MESSAGE_CONTENT_SELECTOR).evaluate_all(EXTRACT_MESSAGES_SCRIPT, limit)
+    except Exception as e:
+        print(f"[PLAYWRIGHT] ⚠️ Message extraction failed: {e}")
+        return []
+
+async def extract_recent_messages_per_locator(page, limit):
+    """Previous extraction path: one inner_text() round trip per message"""
+    locator = page.locator(MESSAGE_CONTENT_SELECTOR)
+    try:
+        count = await locator.count()
+    except Exception:
+        count = 0
+    messages = []
+    for i in range(max(0, count - limit), count):
         try:
-            # Launch Chromium and load storage state if present
-            print("[PLAYWRIGHT] 🧭 Launching Chromium...")
-            browser = await p.chromium.launch(
-                headless=False,
-                args=[
-                    "--no-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-web-security",
-                    "--disable-features=VizDisplayCompositor"
-                ]
-            )
-            if os.path.exists(STORAGE_STATE_PATH):
-                print(f"[PLAYWRIGHT] 💾 Using saved storage state: {STORAGE_STATE_PATH}")
-                context = await browser.new_context(storage_state=STORAGE_STATE_PATH)
-            else:
-                print("[PLAYWRIGHT] ⚠️ Storage state not found. Continuing without it.")
-                context = await browser.new_context()
-            page = await context.new_page()
-            
-            # Set viewport and user agent
-            await page.set_viewport_size({"width": 1280, "height": 720})
-            await page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0"
-            })
-            print("[PLAYWRIGHT] ✅ Browser launched successfully!")
-            
-            # Step 1: Navigate and monitor configured channels
-            print("[PLAYWRIGHT] 🌐 Preparing Discord monitoring with configured channels...")
-            page.set_default_timeout(60000)
-
-            def parse_titles(title_text: str):
-                # Discord title pattern often: "#channel-name - Server Name - Discord"
-                if not title_text:
-                    return ("Current Server", "Current Channel")
-                parts = [p.strip() for p in title_text.split("-")]
-                # Try to infer from leftmost parts
-                if len(parts) >= 2:
-                    channel_part = parts[0].lstrip("#").strip()
-                    server_part = parts[1].strip()
-                    if channel_part:
-                        return (server_part or "Current Server", channel_part or "Current Channel")
-                return ("Current Server", "Current Channel")
-
-            channel_urls = load_channel_urls()
-            if not channel_urls:
-                print("[PLAYWRIGHT] ⚠️ No channel URLs configured. Set DISCORD_CHANNEL_URLS or add to CHANNEL_URLS list.")
-
-            print("[PLAYWRIGHT] 📡 Starting message monitoring over configured channels...")
-            while True:
+            text = await locator.nth(i).inner_text()
+        except Exception:
+            continue
+        messages.append({"id": None, "text": text, "author": None})
+    return messages
+
+ScanResult = namedtuple("ScanResult", ["server_name", "channel_name", "new_messages", "detections"])
+
+async def scan_channel(page, channel_url, before_extract=None):
+    """Navigate to a channel and run join detection on its latest messages"""
+    with metrics.timer("scan_total", channel=channel_url) as scan_timer:
+        result = await run_channel_scan(page, channel_url, before_extract)
+    metrics.inc("monitor_messages_scanned_total", result.new_messages, channel=channel_url)
+    metrics.inc("monitor_detections_total", result.detections, channel=channel_url)
+    print(f"[TIMING] ⏱️ #{result.channel_name}: scan total {scan_timer.elapsed * 1000:.0f} ms")
+    return result
+
+async def run_channel_scan(page, channel_url, before_extract=None):
+    """Open a channel and run detection on messages past its high-water mark
+
+    before_extract(server_name, channel_name), if given, is awaited once the
+    channel is open and before its messages are read.
+    """
+    server_name, channel_name = await open_channel(page, channel_url)
+    channel_classifier.classify(channel_url, server_name, channel_name)
+    matcher = channel_classifier.matcher(channel_url)
+    if before_extract:
+        await before_extract(server_name, channel_name)
+
+    with metrics.timer("extract", channel=channel_url) as extract_timer:
+        if EXTRACTION_MODE == "locator":
+            messages = await extract_recent_messages_per_locator(page, MESSAGES_PER_CHANNEL_SCAN)
+        else:
+            messages = await extract_recent_messages(page, MESSAGES_PER_CHANNEL_SCAN)
+    print(f"[TIMING] ⏱️ #{channel_name}: extract {extract_timer.elapsed * 1000:.0f} ms ({EXTRACTION_MODE})")
+    new_messages = [m for m in messages if advance_high_water(channel_url, m["id"])]
+    # Messages without an ID are rescanned every visit, so only those that moved
+    # the mark count as channel activity for the scheduler
+    advanced = sum(1 for m in new_messages if m["id"])
+    print(f"[PLAYWRIGHT] 💬 {advanced} new of {len(messages)} latest message(s)"
+          f"{f' (+{len(new_messages) - advanced} without an ID)' if len(new_messages) > advanced else ''}")
+
+    detections = await handle_message_batch(new_messages, server_name, channel_name, matcher)
+    if advanced:
+        persist_high_water(channel_url)
+    return ScanResult(server_name, channel_name, advanced, detections)
+
+# In-page observer for push mode. Reports the id and text of every messageContent
+# node appended to the chat list through the exposed "reportNewMessage" binding.
+PUSH_OBSERVER_SCRIPT = """
+() => {
+    if (window.__joinObserverInstalled) return;
+    window.__joinObserverInstalled = true;
+    const selector = '[class*="messageContent"]';
+    const seen = new WeakSet();
+    const report = (node) => {
+        if (seen.has(node) || !node.closest('[data-list-id="chat-messages"]')) return;
+        seen.add(node);
+        const text = node.innerText;
+        const item = node.closest('[id^="chat-messages-"]') || node.closest('[data-list-item-id]');
+        const rawId = (item && (item.id || item.getAttribute('data-list-item-id'))) || node.id || '';
+        const match = rawId.match(/(\\d+)$/);
+        if (text) window.reportNewMessage({ id: match ? match[1] : null, text: text });
+    };
+    new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            for (const added of mutation.addedNodes) {
+                if (added.nodeType !== Node.ELEMENT_NODE) continue;
+                if (added.matches(selector)) report(added);
+                added.querySelectorAll(selector).forEach(report);
+            }
+        }
+    }).observe(document.body, { childList: true, subtree: true });
+}
+"""
+
+async def watch_channel(page, channel_url, page_channels, catch_up_lock):
+    """Install the push observer on a channel's page, then catch up on what it already shows"""
+    async def arm(server_name, channel_name):
+        # Armed before extraction so nothing appended during the catch-up scan is missed
+        page_channels[page] = (channel_url, server_name, channel_name)
+        await page.evaluate(PUSH_OBSERVER_SCRIPT)
+        print(f"[PUSH] 👀 Observer installed for {channel_url}")
+
+    # Pushed messages are held back until the catch-up scan has advanced the
+    # mark; otherwise a push could move it past messages not yet scanned
+    async with catch_up_lock:
+        await scan_channel(page, channel_url, before_extract=arm)
+
+async def run_push_monitoring(supervisor, channel_urls):
+    """Keep one page open per channel and process messages as Discord appends them"""
+    print(f"[PUSH] 📡 Starting push monitoring over {len(channel_urls)} channel(s)...")
+    message_queue = asyncio.Queue()
+    catch_up_lock = asyncio.Lock()
+    page_channels = {}
+    pages = {}
+
+    def on_new_message(source, message):
+        message_queue.put_nowait((source["page"], message))
+
+    async def new_channel_page(channel_url):
+        page = await supervisor.new_page()
+        await page.expose_binding("reportNewMessage", on_new_message)
+        pages[channel_url] = page
+        return page
+
+    for channel_url in channel_urls:
+        try:
+            page = await new_channel_page(channel_url)
+            await watch_channel(page, channel_url, page_channels, catch_up_lock)
+            supervisor.mark_scan_complete()
+        except ContextLost:
+            raise
+        except Exception as e:
+            print(f"[PUSH] ⚠️ Failed to start watching {channel_url}: {e}")
+
+    async def watchdog():
+        # A reload or crash drops the observer; re-open and re-arm those pages
+        saved_marks = dict(channel_high_water)
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            for channel_url, message_id in channel_high_water.items():
+                if saved_marks.get(channel_url) != message_id:
+                    persist_high_water(channel_url)
+            saved_marks = dict(channel_high_water)
+            for channel_url, page in list(pages.items()):
                 try:
-                    for channel_url in channel_urls:
-                        try:
-                            print(f"[PLAYWRIGHT] 🔗 Navigating to channel: {channel_url}")
-                            try:
-                                await page.goto(channel_url, wait_until="networkidle", timeout=60000)
-                            except Exception:
-                                print("[PLAYWRIGHT] ⏳ Initial load failed. Retrying with reload...")
-                                await page.reload()
-                                await asyncio.sleep(5)
-
-                            # Wait for messages to be present
-                            await asyncio.sleep(5)
-                            title_text = await page.title()
-                            server_name, channel_name = parse_titles(title_text)
-                            print(f"[PLAYWRIGHT] 📍 Now at: {server_name} / #{channel_name}")
-
-                            locator = page.locator('[class*="messageContent"]')
-                            try:
-                                count = await locator.count()
-                            except Exception:
-                                count = 0
-                            print(f"[PLAYWRIGHT] 💬 Visible messages: {count}")
-
-                            start_index = max(0, count - MESSAGES_PER_CHANNEL_SCAN)
-                            for i in range(start_index, count):
-                                try:
-                                    text = await locator.nth(i).inner_text()
-                                except Exception:
-                                    continue
-                                if not text:
-                                    continue
-                                username = find_join_username(text)
-                                if username:
-                                    print(f"[PLAYWRIGHT] 🎯 JOIN PATTERN DETECTED! Username: {username}")
-                                    print(f"[PLAYWRIGHT] 📝 Message: {text[:120]}{'...' if len(text) > 120 else ''}")
-                                    await process_new_user_detection(username, server_name, channel_name, text)
-
-                            await asyncio.sleep(RATE_LIMIT_DELAY)
-                        except Exception as e:
-                            print(f"[PLAYWRIGHT] ⚠️ Channel navigation/scan error: {e}")
-                            await asyncio.sleep(RATE_LIMIT_DELAY)
-
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                except KeyboardInterrupt:
-                    print("\n[PLAYWRIGHT] 🛑 Interrupted by user (Ctrl+C)")
-                    break
+                    if page.is_closed():
+                        page_channels.pop(page, None)
+                        page = await new_channel_page(channel_url)
+                    elif await page.evaluate("() => !!window.__joinObserverInstalled"):
+                        continue
+                    print(f"[PUSH] 🔁 Observer lost for {channel_url}, re-arming...")
+                    await watch_channel(page, channel_url, page_channels, catch_up_lock)
+                except ContextLost:
+                    raise
+                except Exception as e:
+                    print(f"[PUSH] ⚠️ Watchdog error for {channel_url}: {e}")
+
+    watchdog_task = asyncio.create_task(watchdog())
+    try:
+        while True:
+            try:
+                page, message = await asyncio.wait_for(message_queue.get(), POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                if watchdog_task.done():
+                    # Surfaces ContextLost (or any watchdog crash) to the supervisor
+                    watchdog_task.result()
+                continue
+            async with catch_up_lock:
+                if page not in page_channels:
+                    continue
+                channel_url, server_name, channel_name = page_channels[page]
+                # Discord re-renders older messages when scrolling, and the catch-up
+                # scan may already have handled this one; skip anything already seen
+                if not advance_high_water(channel_url, message["id"]):
+                    continue
+                try:
+                    await handle_message_text(
+                        message["text"], server_name, channel_name, message["id"], channel_classifier.matcher(channel_url)
+                    )
                 except Exception as e:
-                    print(f"[PLAYWRIGHT] ⚠️ Monitoring loop error: {e}")
-                    await asyncio.sleep(10)
-                
+                    print(f"[PUSH] ⚠️ Failed to process pushed message: {e}")
+    finally:
+        watchdog_task.cancel()
+
+async def launch_monitor_browser(p, profile=None):
+    """Launch Chromium with the launch options of a BROWSER_PROFILES entry"""
+    profile = profile or BROWSER_PROFILE
+    settings = BROWSER_PROFILES[profile]
+    print(f"[PLAYWRIGHT] 🧭 Launching Chromium ({profile} profile)...")
+    return await p.chromium.launch(headless=settings["headless"], args=settings["args"])
+
+async def new_monitor_context(browser, profile=None):
+    """Create the monitoring context, blocking unneeded resources in the lightweight profile"""
+    profile = profile or BROWSER_PROFILE
+    settings = BROWSER_PROFILES[profile]
+    options = {"reduced_motion": "reduce"} if settings["block_resources"] else {}
+    if os.path.exists(STORAGE_STATE_PATH):
+        print(f"[PLAYWRIGHT] 💾 Using saved storage state: {STORAGE_STATE_PATH}")
+        context = await browser.new_context(storage_state=STORAGE_STATE_PATH, **options)
+    else:
+        print("[PLAYWRIGHT] ⚠️ Storage state not found. Continuing without it.")
+        context = await browser.new_context(**options)
+    await apply_profile_to_context(context, profile)
+    return context
+
+async def launch_persistent_monitor_context(p, profile=None):
+    """Launch Chromium on BROWSER_USER_DATA_DIR; returns (context, warm)
+
+    The profile directory keeps cookies, localStorage, the HTTP cache and
+    service workers between runs. The saved storage state is seeded into it
+    on a cold start and again whenever the storage state file is newer than
+    the last seeding.
+    """
+    profile = profile or BROWSER_PROFILE
+    settings = BROWSER_PROFILES[profile]
+    warm = os.path.isdir(BROWSER_USER_DATA_DIR) and bool(os.listdir(BROWSER_USER_DATA_DIR))
+    options = {"reduced_motion": "reduce"} if settings["block_resources"] else {}
+    print(f"[PLAYWRIGHT] 🧭 Launching Chromium ({profile} profile, {'warm' if warm else 'cold'} start from {BROWSER_USER_DATA_DIR})...")
+    context = await p.chromium.launch_persistent_context(
+        BROWSER_USER_DATA_DIR, headless=settings["headless"], args=settings["args"], **options
+    )
+    marker_path = os.path.join(BROWSER_USER_DATA_DIR, SEED_MARKER_NAME)
+    if os.path.exists(STORAGE_STATE_PATH):
+        state_mtime = os.path.getmtime(STORAGE_STATE_PATH)
+        seeded_mtime = os.path.getmtime(marker_path) if os.path.exists(marker_path) else None
+        if seeded_mtime is None or state_mtime > seeded_mtime:
+            await seed_storage_state(context, str(state_mtime))
+            # Written only after seeding succeeded, so a partial seeding is retried
+            with open(marker_path, "w") as f:
+                f.write(STORAGE_STATE_PATH)
+    # No routing here: it would disable the HTTP cache this profile exists to keep
+    await apply_profile_to_context(context, profile, block_requests=False)
+    return context, warm
+
+async def seed_storage_state(context, stamp):
+    """Load the saved storage state's cookies and localStorage into a context"""
+    print(f"[PLAYWRIGHT] 💾 Seeding profile from storage state: {STORAGE_STATE_PATH}")
+    with open(STORAGE_STATE_PATH, "r") as f:
+        state = json.load(f)
+    if state.get("cookies"):
+        await context.add_cookies(state["cookies"])
+    for origin in state.get("origins", []):
+        items = {item["name"]: item["value"] for item in origin.get("localStorage", [])}
+        await context.add_init_script(
+            SEED_LOCAL_STORAGE_SCRIPT % (json.dumps(origin["origin"]), json.dumps(stamp), json.dumps(items))
+        )
+
+async def apply_profile_to_context(context, profile, block_requests=True):
+    settings = BROWSER_PROFILES[profile]
+    if settings["block_resources"]:
+        async def block_unneeded(route):
+            if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        if block_requests:
+            await context.route("**/*", block_unneeded)
+        await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+
+async def new_monitor_page(context):
+    """Open a page in the monitoring context with the standard viewport and headers"""
+    page = await context.new_page()
+    await page.set_viewport_size({"width": 1280, "height": 720})
+    await page.set_extra_http_headers({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0"
+    })
+    page.set_default_timeout(60000)
+    return page
+
+class ChannelScheduler:
+    """Adaptive per-channel poll scheduling.
+
+    Keeps an exponentially-weighted estimate of events per second for each
+    channel (new messages, with detections weighted higher) and polls each
+    channel roughly once per expected event, clamped to
+    [MIN_POLL_INTERVAL_SECONDS, MAX_POLL_INTERVAL_SECONDS]. Quiet channels back
+    off geometrically; the navigation budget still caps the total rate.
+    Channels the prefilter marks infrequent wait INFREQUENT_INTERVAL_FACTOR
+    times longer.
+    """
+
+    def __init__(self, channel_urls):
+        now = time.monotonic()
+        self.activity = {url: 0.0 for url in channel_urls}
+        self.interval = {url: POLL_INTERVAL_SECONDS for url in channel_urls}
+        self.last_visit = {}
+        self.due = [(now, url) for url in channel_urls]
+        heapq.heapify(self.due)
+
+    async def next_channel(self):
+        """Wait for and claim the channel that is due soonest"""
+        while True:
+            if self.due:
+                due_at, channel_url = self.due[0]
+                delay = due_at - time.monotonic()
+                if delay <= 0:
+                    heapq.heappop(self.due)
+                    return channel_url
+            else:
+                delay = 1
+            # Re-check at least every second in case an earlier slot was scheduled
+            await asyncio.sleep(min(delay, 1))
+
+    def record(self, channel_url, new_messages, detections):
+        """Fold a visit's results into the channel's activity and reschedule it"""
+        now = time.monotonic()
+        last_visit = self.last_visit.get(channel_url)
+        self.last_visit[channel_url] = now
+        if last_visit is not None:
+            # The first visit's "new" messages are just the backlog, so it sets no rate
+            rate = (new_messages + DETECTION_ACTIVITY_WEIGHT * detections) / max(now - last_visit, 1)
+            self.activity[channel_url] = (
+                ACTIVITY_EWMA_ALPHA * rate + (1 - ACTIVITY_EWMA_ALPHA) * self.activity[channel_url]
+            )
+            activity = self.activity[channel_url]
+            # A channel that has never shown activity just doubles its interval
+            interval = 1 / activity if activity > 0 else self.interval[channel_url] * 2
+            self.interval[channel_url] = min(MAX_POLL_INTERVAL_SECONDS, max(MIN_POLL_INTERVAL_SECONDS, interval))
+        interval = self.interval[channel_url] * channel_classifier.interval_factor(channel_url)
+        heapq.heappush(self.due, (now + interval, channel_url))
+        print(f"[SCHEDULER] 🗓️ Next poll of {channel_url} in {interval:.0f}s")
+
+class ContextLost(Exception):
+    """The browser context died and the supervisor must relaunch it"""
+
+class PageSupervisor:
+    """Hands out monitoring pages for one context.
+
+    Pages that crashed or were closed are replaced on the next checkout, and
+    pages are recycled after PAGE_RECYCLE_NAVIGATIONS scans to cap Chromium's
+    memory growth. Once the context itself is gone, ContextLost is raised so
+    only the context is relaunched.
+    """
+
+    def __init__(self, context, launched_at, warm):
+        self.context = context
+        self.launched_at = launched_at
+        self.warm = warm
+        self.first_scan_reported = False
+        self.scans_completed = 0
+        self.context_closed = False
+        self.navigations = {}
+        context.on("close", lambda _: setattr(self, "context_closed", True))
+
+    async def new_page(self):
+        if self.context_closed:
+            raise ContextLost("browser context closed")
+        try:
+            page = await new_monitor_page(self.context)
         except Exception as e:
-            print(f"[ERROR] Critical Playwright error: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
+            raise ContextLost(f"could not open a page: {e}") from e
+        self.navigations[page] = 0
+        return page
+
+    async def checkout(self, page):
+        """Return `page`, or a fresh replacement if it crashed or is due for recycling"""
+        if page is not None and not page.is_closed() and self.navigations.get(page, 0) < PAGE_RECYCLE_NAVIGATIONS:
+            return page
+        if page is not None:
+            reason = "closed or crashed" if page.is_closed() else f"recycled after {self.navigations.get(page)} scans"
+            print(f"[SUPERVISOR] ♻️ Replacing page ({reason})")
+            self.navigations.pop(page, None)
             try:
-                if context:
-                    print("[PLAYWRIGHT] 🧹 Closing context...")
-                    await context.close()
+                await page.close()
             except Exception:
                 pass
-            if browser:
-                print("[PLAYWRIGHT] 🚪 Closing browser...")
-                await browser.close()
-                print("[PLAYWRIGHT] ✅ Browser closed and cleanup complete!")
-            else:
-                print("[PLAYWRIGHT] ⚠️ No browser to close")
+        return await self.new_page()
+
+    def record_navigation(self, page):
+        self.navigations[page] = self.navigations.get(page, 0) + 1
+
+    def mark_scan_complete(self):
+        self.scans_completed += 1
+        if self.first_scan_reported:
+            return
+        self.first_scan_reported = True
+        elapsed = time.perf_counter() - self.launched_at
+        start_kind = "warm" if self.warm else "cold"
+        metrics.observe("monitor_time_to_first_scan_seconds", elapsed, start=start_kind)
+        print(f"[STARTUP] ⏱️ Time to first scan: {elapsed:.1f}s ({start_kind} start)")
+
+async def scan_worker(worker_id, supervisor, scheduler):
+    """Poll whichever channel the scheduler says is due next on one page"""
+    page = None
+    while True:
+        page = await supervisor.checkout(page)
+        channel_url = await scheduler.next_channel()
+        new_messages = detections = 0
+        try:
+            result = await scan_channel(page, channel_url)
+            new_messages, detections = result.new_messages, result.detections
+            supervisor.mark_scan_complete()
+        except Exception as e:
+            print(f"[PLAYWRIGHT] ⚠️ Worker {worker_id} channel navigation/scan error: {e}")
+        finally:
+            supervisor.record_navigation(page)
+            scheduler.record(channel_url, new_messages, detections)
+
+async def run_poll_monitoring(supervisor, scheduler, channel_urls):
+    # Up to SCAN_CONCURRENCY pages take due channels from the shared
+    # scheduler; rate_limiter keeps the navigation budget global
+    worker_count = max(1, min(SCAN_CONCURRENCY, len(channel_urls)))
+    print(f"[PLAYWRIGHT] 📡 Starting message monitoring over configured channels with {worker_count} page(s)...")
+    workers = [asyncio.create_task(scan_worker(i, supervisor, scheduler)) for i in range(worker_count)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        # One worker hitting ContextLost must stop the rest before the relaunch
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def start_playwright_monitoring(channel_urls=None):
+    """Start the Playwright monitoring process"""
+    print("[MONITOR] Starting Playwright monitoring...")
+    
+    if channel_urls is None:
+        channel_urls = load_channel_urls()
+    if not channel_urls:
+        print("[PLAYWRIGHT] ⚠️ No channel URLs configured. Set DISCORD_CHANNEL_URLS or add to CHANNEL_URLS list.")
+    # Survives context restarts so polling intervals are not reset
+    scheduler = ChannelScheduler(channel_urls)
+
+    async with async_playwright() as p:
+        restarts = 0
+        while True:
+            browser = None
+            context = None
+            supervisor = None
+            try:
+                # Launch Chromium and load storage state if present
+                launched_at = time.perf_counter()
+                if BROWSER_USER_DATA_DIR:
+                    context, warm = await launch_persistent_monitor_context(p)
+                else:
+                    browser = await launch_monitor_browser(p)
+                    context, warm = await new_monitor_context(browser), False
+                supervisor = PageSupervisor(context, launched_at, warm)
+                print("[PLAYWRIGHT] ✅ Browser launched successfully!")
+
+                # Step 1: Navigate and monitor configured channels
+                print("[PLAYWRIGHT] 🌐 Preparing Discord monitoring with configured channels...")
+                if MONITOR_MODE == "push":
+                    await run_push_monitoring(supervisor, channel_urls)
+                else:
+                    await run_poll_monitoring(supervisor, scheduler, channel_urls)
+                return
+
+            except ContextLost as e:
+                print(f"[SUPERVISOR] 💥 Browser context lost: {e}")
+            except Exception as e:
+                print(f"[ERROR] Critical Playwright error: {e}")
+                import traceback
+                traceback.print_exc()
+            finally:
+                try:
+                    if context:
+                        print("[PLAYWRIGHT] 🧹 Closing context...")
+                        await context.close()
+                except Exception:
+                    pass
+                if browser:
+                    print("[PLAYWRIGHT] 🚪 Closing browser...")
+                    await browser.close()
+                    print("[PLAYWRIGHT] ✅ Browser closed and cleanup complete!")
+
+            # A context that got through a full cycle of scans was healthy, so
+            # only consecutive failures count towards MAX_CONTEXT_RESTARTS
+            if supervisor and supervisor.scans_completed >= max(1, len(channel_urls)):
+                restarts = 0
+            restarts += 1
+            if restarts > MAX_CONTEXT_RESTARTS:
+                print(f"[SUPERVISOR] 🛑 Giving up after {MAX_CONTEXT_RESTARTS} context restarts")
+                raise RuntimeError(f"browser context failed {MAX_CONTEXT_RESTARTS} times in a row")
+            delay = min(300, 5 * 2 ** (restarts - 1))
+            print(f"[SUPERVISOR] 🔁 Relaunching browser context in {delay}s (restart {restarts}/{MAX_CONTEXT_RESTARTS})...")
+            await asyncio.sleep(delay)
+
+class MonitorService:
+    """Runs start_playwright_monitoring on its own thread and event loop.
+
+    Browser automation, matching and cache writes then never hold up the bot's
+    gateway heartbeat. Detections reach the bot through notification_queue,
+    whose submit() is thread-safe. start() is idempotent, so a reconnect that
+    fires on_ready again does not launch a second scanner.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.loop = None
+        self.task = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, channel_urls):
+        if self.is_running():
+            print("[MONITOR] Scanner thread already running; not starting another.")
+            return False
+        self.thread = threading.Thread(target=self.run, args=(channel_urls,), name="playwright-monitor", daemon=True)
+        self.thread.start()
+        return True
+
+    def run(self, channel_urls):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.task = self.loop.create_task(start_playwright_monitoring(channel_urls))
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            print("[MONITOR] Scanner thread stopped.")
+        except Exception as e:
+            print(f"[ERROR] Scanner thread crashed: {e}")
+            queue_notification(f"Playwright scanner stopped unexpectedly: {e}", is_error=True)
+        finally:
+            self.loop.close()
+
+    def stop(self, timeout=30):
+        """Cancel the scanner from any thread and wait for its browser cleanup"""
+        if self.is_running() and self.task:
+            print("[SHUTDOWN] Stopping Playwright scanner...")
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.thread.join(timeout)
+
+monitor_service = MonitorService()
+
+# Channels (and their guilds) ingested straight from gateway events
+gateway_channel_ids = set()
+gateway_guild_ids = set()
+
+def parse_channel_url(channel_url):
+    """Return (guild_id, channel_id) from a discord.com/channels URL, or None"""
+    match = re.search(r"/channels/(\d+)/(\d+)", channel_url)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def load_channel_sources():
+    """Parse DISCORD_CHANNEL_SOURCES ("<channel_id>=gateway|playwright,...") into a dict"""
+    sources = {}
+    for part in os.getenv("DISCORD_CHANNEL_SOURCES", "").split(","):
+        channel_id, _, source = part.partition("=")
+        if channel_id.strip().isdigit() and source.strip().lower() in ("gateway", "playwright"):
+            sources[int(channel_id.strip())] = source.strip().lower()
+    return sources
+
+def bot_can_read(channel_id):
+    """True if the bot can read the channel's messages, not merely see it in its cache"""
+    channel = client.get_channel(channel_id)
+    guild = getattr(channel, "guild", None)
+    if channel is None or guild is None or guild.me is None:
+        return False
+    permissions = channel.permissions_for(guild.me)
+    return permissions.read_messages and permissions.read_message_history
+
+def split_channels_by_source(channel_urls):
+    """Assign each channel to gateway ingestion or Playwright; returns the Playwright URLs.
+
+    Channels without an override use the gateway whenever the bot can read them;
+    anything the bot cannot read, even when forced to the gateway, stays on Playwright.
+    """
+    sources = load_channel_sources()
+    playwright_urls = []
+    gateway_channel_ids.clear()
+    gateway_guild_ids.clear()
+    for channel_url in channel_urls:
+        ids = parse_channel_url(channel_url)
+        if ids:
+            guild_id, channel_id = ids
+            source = sources.get(channel_id, "auto")
+            if source != "playwright":
+                if bot_can_read(channel_id):
+                    gateway_channel_ids.add(channel_id)
+                    gateway_guild_ids.add(guild_id)
+                    continue
+                if source == "gateway":
+                    print(f"[GATEWAY] ⚠️ Channel {channel_id} is forced to the gateway but the bot cannot read it; using Playwright.")
+                elif client.get_channel(channel_id) is not None:
+                    print(f"[GATEWAY] ⚠️ Bot sees channel {channel_id} but lacks read permissions; using Playwright.")
+        playwright_urls.append(channel_url)
+    print(f"[CONFIG] {len(gateway_channel_ids)} channel(s) via gateway, {len(playwright_urls)} via Playwright.")
+    return playwright_urls
+
+async def ingest_gateway_message(message):
+    """Run join detection on a message received over the gateway"""
+    if message.type == discord.MessageType.new_member:
+        # Discord's own join system message; share the key used by on_member_join
+        username = message.author.name
+        dedup_id = f"join_{message.guild.id}_{message.author.id}"
+    else:
+        username = find_join_username(message.content)
+        dedup_id = str(message.id)
+    if username:
+        print(f"[GATEWAY] 🎯 JOIN DETECTED! Username: {username}")
+        content = message.content or f"{message.author.name} joined the server"
+        await process_new_user_detection(username, message.guild.name, message.channel.name, content, dedup_id)
+
+@client.event
+async def on_member_join(member):
+    if member.guild.id not in gateway_guild_ids:
+        return
+    print(f"[GATEWAY] 🎯 MEMBER JOINED! Username: {member.name} ({member.guild.name})")
+    channel_name = member.guild.system_channel.name if member.guild.system_channel else "member-join"
+    await process_new_user_detection(
+        member.name, member.guild.name, channel_name,
+        f"{member.name} joined the server", f"join_{member.guild.id}_{member.id}"
+    )
+
+ready_once = False
 
 @client.event
 async def on_ready():
     print(f"[READY] Logged in as {client.user} ({client.user.id})")
     print(f"[READY] Playwright Discord Monitor is online!")
     
+    # on_ready fires again after every gateway reconnect; only set up once
+    global ready_once
+    if ready_once:
+        print("[READY] Reconnected; cache and monitoring are already running.")
+        return
+    
     load_cache()
+    notification_queue.start(asyncio.get_running_loop())
+    # Set only once setup has succeeded, so a failure is retried on the next reconnect
+    ready_once = True
+    try:
+        await start_metrics_exporters()
+    except Exception as e:
+        # Metrics are optional; never let them keep the scanner from starting
+        print(f"[METRICS] ⚠️ Could not start metrics exporters: {e}")
+        queue_notification(f"Metrics exporters failed to start: {e}", is_error=True)
     
     # Send startup notification
     startup_msg = (
@@ -431,8 +2006,14 @@ async def on_ready():
     await send_notification(startup_msg)
     print("[READY] Bot is ready and Playwright monitoring is active!")
     
-    # Start Playwright monitoring in background
-    client.loop.create_task(start_playwright_monitoring())
+    # Channels the bot can see come in over the gateway; only the rest need a browser
+    playwright_urls = split_channels_by_source(load_channel_urls())
+    if playwright_urls:
+        monitor_service.start(playwright_urls)
+    elif gateway_channel_ids:
+        print("[READY] All channels are covered by the gateway; not launching Playwright.")
+    else:
+        print("[READY] ⚠️ No channel URLs configured. Set DISCORD_CHANNEL_URLS or add to CHANNEL_URLS list.")
 
 @client.event
 async def on_message(message):
@@ -440,6 +2021,9 @@ async def on_message(message):
     if message.author.id == client.user.id:
         return
     
+    if message.guild and message.channel.id in gateway_channel_ids:
+        await ingest_gateway_message(message)
+    
     # Test commands
     if message.content.lower() == "!testplaywright":
         test_msg = (
@@ -463,6 +2047,12 @@ async def on_message(message):
         for server in TARGET_SERVERS:
             channels_info += f"🎯 {server}\n"
         
+        tiers = channel_classifier.snapshot()
+        if tiers:
+            channels_info += f"\n**Scan Tiers:**\n"
+            for channel_url, tier in tiers:
+                channels_info += f"• {channel_url}: {tier}\n"
+        
         await message.channel.send(channels_info)
         return
     
@@ -503,23 +2093,51 @@ async def on_message(message):
         status_msg = (
             f"📊 **PLAYWRIGHT MONITOR STATUS**\n\n"
             f"**Bot Status:** ONLINE ✅\n"
-            f"**Playwright:** ACTIVE 🚀\n"
+            f"**Playwright:** {'ACTIVE 🚀' if monitor_service.is_running() else 'STOPPED ⛔'}\n"
             f"**Target:** Melonly Server 🎯\n"
             f"**Channels:** Welcome Detection 🔍\n\n"
             f"**Configuration:**\n"
             f"• Welcome Keywords: {len(WELCOME_CHANNEL_KEYWORDS)}\n"
             f"• Join Patterns: {len(JOIN_PATTERNS)}\n"
             f"• Rate Limit: {RATE_LIMIT_DELAY}s\n"
-            f"• Max Operations: {MAX_OPERATIONS_PER_HOUR}/hour\n\n"
+            f"• Max Operations: {MAX_OPERATIONS_PER_HOUR}/hour "
+            f"({rate_limiter.snapshot()['navigation']['used_last_hour']} used)\n\n"
             f"**Commands:**\n"
             f"• `!testplaywright` - Test system\n"
             f"• `!channels` - Show keywords\n"
             f"• `!monitor` - Show status\n"
             f"• `!melonly` - Melonly info\n"
+            f"• `!budget` - Rate limit budget usage\n"
+            f"• `!metrics` - Scan pipeline metrics\n"
             f"• `!status` - This message"
         )
         await message.channel.send(status_msg)
         return
+    
+    if message.content.lower() == "!metrics":
+        if not metrics.enabled:
+            await message.channel.send("📈 **SCAN METRICS**\n\nMetrics are disabled. Set `METRICS_ENABLED=1` to collect them.")
+            return
+        counters, stages = metrics.summary()
+        metrics_msg = f"📈 **SCAN METRICS**\n\n**Counters:**\n"
+        for name, value in sorted(counters.items()):
+            metrics_msg += f"• {name}: {value:.0f}\n"
+        metrics_msg += f"\n**Stage timings (mean):**\n"
+        for stage, (mean, count) in sorted(stages.items()):
+            metrics_msg += f"• {stage}: {mean * 1000:.0f} ms over {count} run(s)\n"
+        await message.channel.send(metrics_msg[:2000])
+        return
+    
+    if message.content.lower() == "!budget":
+        budget_msg = f"⏱️ **RATE LIMIT BUDGET**\n\n"
+        for category, usage in rate_limiter.snapshot().items():
+            budget_msg += (
+                f"**{category.title()}:** {usage['used_last_hour']}/{usage['per_hour']} in the last hour\n"
+                f"• Tokens: {usage['tokens']:.1f}/{usage['capacity']}\n"
+                f"• Next slot in: {usage['wait_seconds']:.0f}s\n\n"
+            )
+        await message.channel.send(budget_msg)
+        return
 
 # START THE BOT
 if __name__ == "__main__":
@@ -533,4 +2151,9 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"[ERROR] Bot crashed: {e}")
     finally:
+        # Let the scanner close its browser context so the persistent profile is
+        # left intact, then flush the cache log
+        monitor_service.stop()
+        with cache_lock:
+            cache_log.close()
         print("[SHUTDOWN] Playwright Discord Monitor shutdown complete!")